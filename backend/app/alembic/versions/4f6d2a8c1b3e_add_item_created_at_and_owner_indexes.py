@@ -0,0 +1,35 @@
+"""Add item created_at and owner indexes
+
+Revision ID: 4f6d2a8c1b3e
+Revises: 1a31ce608336
+Create Date: 2026-10-18 10:12:41.305217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4f6d2a8c1b3e'
+down_revision = '1a31ce608336'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The default is evaluated once, existing rows get the migration time
+    # without rewriting the table
+    op.add_column('item', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    # CREATE INDEX CONCURRENTLY doesn't block writes but can't run in a
+    # transaction. If it fails it leaves an INVALID index to drop before retrying
+    with op.get_context().autocommit_block():
+        op.create_index('ix_item_owner_id_created_at_id', 'item', ['owner_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_item_created_at_id', 'item', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_item_created_at_id', table_name='item', postgresql_concurrently=True)
+        op.drop_index('ix_item_owner_id_created_at_id', table_name='item', postgresql_concurrently=True)
+    op.drop_column('item', 'created_at')
@@ -0,0 +1,30 @@
+"""Add user and item row versions
+
+Revision ID: 8e4b1f6a2c93
+Revises: 3d5f8e21a9c7
+Create Date: 2026-10-18 16:41:07.528913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b1f6a2c93'
+down_revision = '3d5f8e21a9c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Constant defaults, existing rows get them without rewriting the tables
+    for table in ('user', 'item'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade():
+    for table in ('item', 'user'):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
@@ -0,0 +1,31 @@
+"""Index user email case-insensitively
+
+Revision ID: b7e3c95d20a4
+Revises: 4f6d2a8c1b3e
+Create Date: 2026-10-18 11:03:27.918342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3c95d20a4'
+down_revision = '4f6d2a8c1b3e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if two existing emails only differ in case, they have to be merged
+    # or renamed first. Built concurrently, see 4f6d2a8c1b3e
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=True, postgresql_concurrently=True)
+        op.drop_index('ix_user_email', table_name='user', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_email', 'user', ['email'], unique=True, postgresql_concurrently=True)
+        op.drop_index('ix_user_email_lower', table_name='user', postgresql_concurrently=True)
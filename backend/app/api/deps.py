@@ -1,17 +1,25 @@
-from collections.abc import Generator
+import hashlib
+import time
+import uuid
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator
+from datetime import datetime
 from typing import Annotated
 
-import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app import crud
 from app.core import security
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.db import engine
-from app.models import TokenPayload, User
+from app.core.db import async_engine, engine
+from app.core.ratelimit import rate_limit
+from app.models import TokenPayload, TokenUser, User, UserPublic, UserPublicVersioned
+from app.utils import decode_cursor
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -23,35 +31,154 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Expiring on commit would make attribute access after a commit lazy load,
+    # which can't happen implicitly under asyncio
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+# Validated payloads of recently used tokens, keyed by the SHA-256 of the token
+token_cache: TTLCache[str, TokenPayload] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=0
+)
+
+
+def decode_token(token: str) -> TokenPayload:
+    """
+    Validate an access token, tokens seen before their expiration skip the
+    signature verification and payload validation.
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    token_data = token_cache.get(digest)
+    if token_data is not None:
+        return token_data
+    payload = security.decode_access_token(token)
+    token_data = TokenPayload(**payload)
+    if "exp" in payload:
+        token_cache.set(digest, token_data, ttl=payload["exp"] - time.time())
+    return token_data
+
+
+def get_cursor_id(cursor: str) -> uuid.UUID:
+    values = decode_cursor(cursor)
+    if values and len(values) == 1:
+        try:
+            return uuid.UUID(values[0])
+        except ValueError:
+            pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_cursor_created_at_id(cursor: str) -> tuple[datetime, uuid.UUID]:
+    values = decode_cursor(cursor)
+    if values and len(values) == 2:
+        try:
+            return datetime.fromisoformat(values[0]), uuid.UUID(values[1])
+        except ValueError:
+            pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> TokenUser:
+    """
+    User authorized by the access token claims, without reading the database.
+    """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = decode_token(token)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    user: TokenUser | UserPublic | None = None
+    if token_data.sub is None:
+        pass
+    elif token_data.is_active is None or token_data.is_superuser is None:
+        # Issued before the user state claims were added
+        user = await crud.get_cached_user_async(session=session, user_id=token_data.sub)
+    else:
+        try:
+            user = TokenUser(
+                id=uuid.UUID(token_data.sub),
+                is_active=token_data.is_active,
+                is_superuser=token_data.is_superuser,
+            )
+        except ValueError:
+            pass
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return TokenUser(
+        id=user.id, is_active=user.is_active, is_superuser=user.is_superuser
+    )
+
+
+CurrentUser = Annotated[TokenUser, Depends(get_current_user)]
+
+
+async def get_current_user_public(
+    session: AsyncSessionDep, current_user: CurrentUser
+) -> UserPublicVersioned:
+    """
+    Public fields of the current user, for the routes that return them.
+    """
+    user = await crud.get_cached_user_async(
+        session=session, user_id=str(current_user.id)
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # Read anyway, so deactivations apply here before the token expires
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUserPublic = Annotated[UserPublicVersioned, Depends(get_current_user_public)]
+
+
+async def get_current_db_user(
+    session: AsyncSessionDep, current_user: CurrentUser
+) -> User:
+    """
+    Database row of the current user, for the routes that need to modify it.
+    """
+    user = await session.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+CurrentDBUser = Annotated[User, Depends(get_current_db_user)]
+
+
+async def get_current_active_superuser(current_user: CurrentUser) -> TokenUser:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def get_client_ip(request: Request) -> str:
+    # Behind a proxy, this is the client address only when the server trusts
+    # its forwarded headers, see FORWARDED_ALLOW_IPS
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_per_ip(name: str, *, limit: int) -> Callable[[Request], Awaitable[None]]:
+    """
+    Dependency limiting the requests of each client IP to the routes sharing
+    `name`, checked before the route does any work.
+    """
+
+    async def check_rate_limit(request: Request) -> None:
+        await rate_limit(f"{name}:ip:{get_client_ip(request)}", limit=limit)
+
+    return check_rate_limit
@@ -1,77 +1,426 @@
+import codecs
+import csv
+import io
+import json
 import uuid
-from typing import Any
+from collections.abc import AsyncIterator
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+import orjson
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import DateTime, Uuid, literal, select, tuple_
+from sqlmodel import col
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.deps import CurrentUser, SessionDep
-from app.models import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
+from app import crud
+from app.api.deps import AsyncSessionDep, CurrentUser, get_cursor_created_at_id
+from app.core.conditional import conditional_response, make_etag
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models import (
+    Item,
+    ItemBulkError,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemPublic,
+    ItemsBulkDeleted,
+    ItemsBulkPublic,
+    ItemsImported,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+    TokenUser,
+)
+from app.utils import encode_cursor
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+# Rows are validated one by one so that invalid ones are reported by index
+BulkRows = Annotated[
+    list[dict[str, Any]], Body(max_length=settings.ITEMS_BULK_MAX_SIZE)
+]
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def check_bulk_access(
+    *,
+    session: AsyncSession,
+    current_user: TokenUser,
+    ids: list[tuple[int, uuid.UUID]],
+) -> tuple[list[int], dict[uuid.UUID, uuid.UUID], list[ItemBulkError]]:
+    """
+    Split the (index, item id) pairs of a bulk request into the indexes the
+    current user can modify and the errors for the others.
+    """
+    owners = await crud.get_item_owners_async(
+        session=session, ids=[item_id for _, item_id in ids]
+    )
+    allowed: list[int] = []
+    errors: list[ItemBulkError] = []
+    seen: set[uuid.UUID] = set()
+    for index, item_id in ids:
+        if item_id in seen:
+            errors.append(ItemBulkError(index=index, detail="Duplicate item"))
+        elif item_id not in owners:
+            errors.append(ItemBulkError(index=index, detail="Item not found"))
+        elif not current_user.is_superuser and owners[item_id] != current_user.id:
+            errors.append(ItemBulkError(index=index, detail="Not enough permissions"))
+        else:
+            allowed.append(index)
+        seen.add(item_id)
+    return allowed, owners, errors
+
 
 @router.get("/", response_model=ItemsPublic)
-def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def read_items(
+    request: Request,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    count: crud.CountStrategy = "exact",
 ) -> Any:
     """
-    Retrieve items.
-    """
+    Retrieve items, oldest first.
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
+    Pass the `next_cursor` of a previous page as `cursor` to seek directly to
+    the following page instead of using `skip`. Use `count` to get a cached or
+    estimated total instead of an exact one, or `none` to skip counting.
+
+    Pages carry an `ETag`, send it back in `If-None-Match` to get a `304 Not
+    Modified` response when the page didn't change.
+    """
+    cache_key = None
+    if current_user.is_superuser and settings.LIST_CACHE_TTL_SECONDS:
+        cache_key = await crud.get_list_page_key_async(
+            table="item", query=str(request.query_params)
         )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+        cached = await crud.get_cached_list_page_async(key=cache_key)
+        if cached:
+            etag, content = cached
+            return conditional_response(request, content, etag=etag)
+    statement = (
+        select(*crud.ITEM_PUBLIC_COLUMNS, col(Item.version))
+        .order_by(col(Item.created_at), col(Item.id))
+        .limit(limit)
+    )
+    owner_id = None
+    if not current_user.is_superuser:
+        owner_id = current_user.id
+        statement = statement.where(col(Item.owner_id) == owner_id)
+    if cursor:
+        after_created_at, after_id = get_cursor_created_at_id(cursor)
+        statement = statement.where(
+            tuple_(col(Item.created_at), col(Item.id))
+            > tuple_(
+                literal(after_created_at, DateTime(timezone=True)),
+                literal(after_id, Uuid()),
+            )
         )
-        items = session.exec(statement).all()
+    else:
+        statement = statement.offset(skip)
+
+    total = await crud.count_items_async(
+        session=session, owner_id=owner_id, strategy=count
+    )
+    rows = await crud.fetch_rows_async(session=session, statement=statement)
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
 
-    return ItemsPublic(data=items, count=count)
+    etag = make_etag(total, next_cursor, *(f"{row.id}.{row.version}" for row in rows))
+    data = [row._asdict() for row in rows]
+    for item in data:
+        del item["version"]
+    # The rows have the fields of ItemPublic, encode them directly instead of
+    # validating them again through the response model
+    content = orjson.dumps(
+        {"data": data, "count": total, "next_cursor": next_cursor},
+        option=orjson.OPT_UTC_Z,
+    )
+    if cache_key:
+        await crud.cache_list_page_async(key=cache_key, etag=etag, content=content)
+    return conditional_response(request, content, etag=etag)
+
+
+@router.post("/bulk", response_model=ItemsBulkPublic)
+async def create_items_bulk(
+    *, session: AsyncSessionDep, current_user: CurrentUser, items_in: BulkRows
+) -> Any:
+    """
+    Create several items in one transaction.
+
+    Rows that don't validate are reported in `errors`, the others are created.
+    """
+    valid: list[ItemCreate] = []
+    errors: list[ItemBulkError] = []
+    for index, row in enumerate(items_in):
+        try:
+            valid.append(ItemCreate.model_validate(row))
+        except ValidationError as e:
+            errors.append(ItemBulkError(index=index, detail=format_validation_error(e)))
+    items = await crud.create_items_async(
+        session=session, items_in=valid, owner_id=current_user.id
+    )
+    return ItemsBulkPublic(
+        data=[ItemPublic.model_validate(item) for item in items], errors=errors
+    )
+
+
+@router.patch("/bulk", response_model=ItemsBulkPublic)
+async def update_items_bulk(
+    *, session: AsyncSessionDep, current_user: CurrentUser, items_in: BulkRows
+) -> Any:
+    """
+    Update several items in one transaction, each row needs the item `id`.
+
+    Rows that don't validate or that refer to items that don't exist or can't
+    be modified are reported in `errors`, the others are updated.
+    """
+    valid: dict[int, ItemBulkUpdate] = {}
+    errors: list[ItemBulkError] = []
+    for index, row in enumerate(items_in):
+        try:
+            item_in = ItemBulkUpdate.model_validate(row)
+        except ValidationError as e:
+            errors.append(ItemBulkError(index=index, detail=format_validation_error(e)))
+            continue
+        if "title" in item_in.model_fields_set and item_in.title is None:
+            errors.append(ItemBulkError(index=index, detail="title: can't be null"))
+            continue
+        valid[index] = item_in
+    allowed, _, access_errors = await check_bulk_access(
+        session=session,
+        current_user=current_user,
+        ids=[(index, item_in.id) for index, item_in in valid.items()],
+    )
+    items = await crud.update_items_async(
+        session=session, items_in=[valid[index] for index in allowed]
+    )
+    errors = sorted(errors + access_errors, key=lambda error: error.index)
+    return ItemsBulkPublic(
+        data=[ItemPublic.model_validate(item) for item in items], errors=errors
+    )
+
+
+@router.delete("/bulk", response_model=ItemsBulkDeleted)
+async def delete_items_bulk(
+    *,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    ids: Annotated[list[uuid.UUID], Body(max_length=settings.ITEMS_BULK_MAX_SIZE)],
+) -> Any:
+    """
+    Delete several items by ID in one transaction.
+
+    IDs of items that don't exist or can't be deleted are reported in `errors`.
+    """
+    allowed, owners, errors = await check_bulk_access(
+        session=session, current_user=current_user, ids=list(enumerate(ids))
+    )
+    deleted_ids = await crud.delete_items_async(
+        session=session, ids=[ids[index] for index in allowed]
+    )
+    for owner_id in {owners[ids[index]] for index in allowed}:
+        crud.invalidate_item_count(owner_id=owner_id)
+    return ItemsBulkDeleted(ids=deleted_ids, errors=errors)
+
+
+async def iter_export(
+    *, owner_id: uuid.UUID | None, export_format: Literal["ndjson", "csv"]
+) -> AsyncIterator[str]:
+    # The request session is closed before a streaming response is sent, so the
+    # export reads through its own session
+    async with AsyncSession(async_engine) as session:
+        if export_format == "csv":
+            yield ",".join(ItemPublic.model_fields) + "\r\n"
+        async for rows in crud.stream_items_async(session=session, owner_id=owner_id):
+            items = [ItemPublic.model_validate(row._mapping) for row in rows]
+            if export_format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    item.model_dump(mode="json").values() for item in items
+                )
+                yield buffer.getvalue()
+            else:
+                yield "".join(item.model_dump_json() + "\n" for item in items)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Drops the byte order mark Excel writes at the start of CSV files
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def iter_import_rows(
+    chunks: AsyncIterator[bytes], import_format: Literal["ndjson", "csv"]
+) -> AsyncIterator[tuple[dict[str, Any] | None, str | None]]:
+    """
+    Parse an uploaded file as it is received, yielding each row as a dict or,
+    for rows that can't be parsed, the error.
+    """
+    header: list[str] | None = None
+    record = ""
+    async for line in iter_lines(chunks):
+        if import_format == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield None, "Invalid JSON"
+                continue
+            if isinstance(row, dict):
+                yield row, None
+            else:
+                yield None, "Row must be a JSON object"
+            continue
+        # A CSV record continues on the next line while a quoted field is open
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        fields, record = next(csv.reader([record]), []), ""
+        if not fields:
+            continue
+        if header is None:
+            header = fields
+        elif len(fields) != len(header):
+            yield None, f"Expected {len(header)} fields, got {len(fields)}"
+        else:
+            # Empty fields are missing values, as written by the export
+            yield (
+                {
+                    key: value
+                    for key, value in zip(header, fields, strict=True)
+                    if value
+                },
+                None,
+            )
+    if record:
+        yield None, "Unterminated quoted field"
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_items(
+    current_user: CurrentUser, format: Literal["ndjson", "csv"] = "ndjson"
+) -> Any:
+    """
+    Export all the items, as newline delimited JSON or CSV, streamed in batches.
+    """
+    owner_id = None if current_user.is_superuser else current_user.id
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_export(owner_id=owner_id, export_format=format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="items.{format}"'},
+    )
+
+
+@router.post("/import", response_model=ItemsImported)
+async def import_items(
+    request: Request,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    format: Literal["ndjson", "csv"] = "ndjson",
+) -> Any:
+    """
+    Import items from a newline delimited JSON or CSV request body, the format
+    of the export.
+
+    The body is parsed as it is received and the valid rows are loaded in
+    batches as they fill up, so a failure part way keeps the batches loaded so
+    far. Invalid rows are skipped and reported by their position in the file.
+    """
+    imported = 0
+    rejected = 0
+    errors: list[ItemBulkError] = []
+    batch: list[ItemCreate] = []
+    index = -1
+    async for row, error in iter_import_rows(request.stream(), format):
+        index += 1
+        if row is not None:
+            try:
+                item_in = ItemCreate.model_validate(row)
+            except ValidationError as e:
+                error = format_validation_error(e)
+            else:
+                # Postgres text can't hold NUL, COPY would fail the whole batch
+                if "\x00" in f"{item_in.title}{item_in.description or ''}":
+                    error = "Text can't contain NUL characters"
+                else:
+                    batch.append(item_in)
+        if error is not None:
+            rejected += 1
+            if len(errors) < settings.ITEMS_IMPORT_MAX_ERRORS:
+                errors.append(ItemBulkError(index=index, detail=error))
+        if len(batch) >= settings.ITEMS_IMPORT_BATCH_SIZE:
+            imported += await crud.copy_items_async(
+                session=session, items_in=batch, owner_id=current_user.id
+            )
+            batch = []
+    imported += await crud.copy_items_async(
+        session=session, items_in=batch, owner_id=current_user.id
+    )
+    return ItemsImported(imported=imported, rejected=rejected, errors=errors)
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+async def read_item(
+    request: Request, session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID
+) -> Any:
     """
     Get item by ID.
+
+    Send the `ETag` of a previous response in `If-None-Match` to get a `304 Not
+    Modified` response when the item didn't change.
     """
-    item = session.get(Item, id)
+    item = await crud.get_item_public_async(session=session, item_id=id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return item
+    content = item._asdict()
+    version, updated_at = content.pop("version"), content.pop("updated_at")
+    return conditional_response(
+        request,
+        content,
+        etag=make_etag(item.id, version),
+        last_modified=updated_at,
+    )
 
 
 @router.post("/", response_model=ItemPublic)
-def create_item(
-    *, session: SessionDep, current_user: CurrentUser, item_in: ItemCreate
+async def create_item(
+    *, session: AsyncSessionDep, current_user: CurrentUser, item_in: ItemCreate
 ) -> Any:
     """
     Create new item.
     """
-    item = Item.model_validate(item_in, update={"owner_id": current_user.id})
-    session.add(item)
-    session.commit()
-    session.refresh(item)
+    item = await crud.create_item_async(
+        session=session, item_in=item_in, owner_id=current_user.id
+    )
     return item
 
 
 @router.put("/{id}", response_model=ItemPublic)
-def update_item(
+async def update_item(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     id: uuid.UUID,
     item_in: ItemUpdate,
@@ -79,7 +428,7 @@ def update_item(
     """
     Update an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
@@ -87,23 +436,27 @@ def update_item(
     update_dict = item_in.model_dump(exclude_unset=True)
     item.sqlmodel_update(update_dict)
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
+    await crud.invalidate_cached_lists_async(table="item")
     return item
 
 
 @router.delete("/{id}")
-def delete_item(
-    session: SessionDep, current_user: CurrentUser, id: uuid.UUID
+async def delete_item(
+    session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID
 ) -> Message:
     """
     Delete an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(item)
-    session.commit()
+    owner_id = item.owner_id
+    await session.delete(item)
+    await session.commit()
+    crud.invalidate_item_count(owner_id=owner_id)
+    await crud.invalidate_cached_lists_async(table="item")
     return Message(message="Item deleted successfully")
@@ -6,57 +6,110 @@ from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.api.deps import (
+    AsyncSessionDep,
+    CurrentUserPublic,
+    get_current_active_superuser,
+    rate_limit_per_ip,
+)
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
-from app.models import Message, NewPassword, Token, UserPublic
+from app.core.outbox import email_outbox
+from app.core.ratelimit import check_rate_limit, rate_limit
+from app.core.security import get_password_hash_async
+from app.models import Message, NewPassword, Token, TokenRefresh, User, UserPublic
 from app.utils import (
     generate_password_reset_token,
     generate_reset_password_email,
-    send_email,
     verify_password_reset_token,
 )
 
 router = APIRouter(tags=["login"])
 
 
-@router.post("/login/access-token")
-def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+def create_tokens(user: User, refresh_token: str) -> Token:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return Token(
+        access_token=security.create_access_token(
+            user.id,
+            expires_delta=access_token_expires,
+            claims={"is_active": user.is_active, "is_superuser": user.is_superuser},
+        ),
+        refresh_token=refresh_token,
+    )
+
+
+@router.post(
+    "/login/access-token",
+    dependencies=[
+        Depends(rate_limit_per_ip("login", limit=settings.LOGIN_RATE_LIMIT_PER_IP))
+    ],
+)
+async def login_access_token(
+    session: AsyncSessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
     """
-    OAuth2 compatible token login, get an access token for future requests
+    OAuth2 compatible token login, get an access token for future requests and
+    a refresh token to renew it
     """
-    user = crud.authenticate(
+    # Only the failed attempts count, users logging in often aren't limited
+    account_key = f"login:account:{form_data.username.lower()}"
+    await check_rate_limit(account_key, limit=settings.LOGIN_RATE_LIMIT_PER_ACCOUNT)
+    user = await crud.authenticate_async(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
+        await rate_limit(account_key, limit=settings.LOGIN_RATE_LIMIT_PER_ACCOUNT)
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return Token(
-        access_token=security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        )
+    refresh_token = await crud.create_refresh_token_async(
+        session=session, user_id=user.id
     )
+    return create_tokens(user, refresh_token)
+
+
+@router.post("/login/refresh")
+async def refresh_access_token(session: AsyncSessionDep, body: TokenRefresh) -> Token:
+    """
+    Get a new access token, and a new refresh token replacing the given one
+    """
+    rotated = await crud.rotate_refresh_token_async(
+        session=session, token=body.refresh_token
+    )
+    if not rotated:
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+    user, refresh_token = rotated
+    return create_tokens(user, refresh_token)
 
 
 @router.post("/login/test-token", response_model=UserPublic)
-def test_token(current_user: CurrentUser) -> Any:
+async def test_token(current_user: CurrentUserPublic) -> Any:
     """
     Test access token
     """
     return current_user
 
 
-@router.post("/password-recovery/{email}")
-def recover_password(email: str, session: SessionDep) -> Message:
+@router.post(
+    "/password-recovery/{email}",
+    dependencies=[
+        Depends(
+            rate_limit_per_ip(
+                "password-recovery", limit=settings.PASSWORD_RECOVERY_RATE_LIMIT_PER_IP
+            )
+        )
+    ],
+)
+async def recover_password(email: str, session: AsyncSessionDep) -> Message:
     """
     Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    await rate_limit(
+        f"password-recovery:account:{email.lower()}",
+        limit=settings.PASSWORD_RECOVERY_RATE_LIMIT_PER_ACCOUNT,
+    )
+    user = await crud.get_user_by_email_async(session=session, email=email)
 
     if not user:
         raise HTTPException(
@@ -67,7 +120,7 @@ def recover_password(email: str, session: SessionDep) -> Message:
     email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
-    send_email(
+    email_outbox.enqueue(
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -75,15 +128,24 @@ def recover_password(email: str, session: SessionDep) -> Message:
     return Message(message="Password recovery email sent")
 
 
-@router.post("/reset-password/")
-def reset_password(session: SessionDep, body: NewPassword) -> Message:
+@router.post(
+    "/reset-password/",
+    dependencies=[
+        Depends(
+            rate_limit_per_ip(
+                "reset-password", limit=settings.PASSWORD_RECOVERY_RATE_LIMIT_PER_IP
+            )
+        )
+    ],
+)
+async def reset_password(session: AsyncSessionDep, body: NewPassword) -> Message:
     """
     Reset password
     """
     email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.get_user_by_email_async(session=session, email=email)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -91,10 +153,11 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await get_password_hash_async(body.new_password)
     user.hashed_password = hashed_password
     session.add(user)
-    session.commit()
+    await crud.revoke_refresh_tokens_async(session=session, user_id=user.id)
+    await session.commit()
     return Message(message="Password updated successfully")
 
 
@@ -103,11 +166,11 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
     dependencies=[Depends(get_current_active_superuser)],
     response_class=HTMLResponse,
 )
-def recover_password_html_content(email: str, session: SessionDep) -> Any:
+async def recover_password_html_content(email: str, session: AsyncSessionDep) -> Any:
     """
     HTML Content for Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.get_user_by_email_async(session=session, email=email)
 
     if not user:
         raise HTTPException(
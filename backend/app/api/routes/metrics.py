@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics() -> Response:
+    """
+    Prometheus metrics, of all the worker processes when PROMETHEUS_MULTIPROC_DIR
+    is set.
+    """
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -1,17 +1,24 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlmodel import col, delete
 
 from app import crud
 from app.api.deps import (
+    AsyncSessionDep,
+    CurrentDBUser,
     CurrentUser,
-    SessionDep,
+    CurrentUserPublic,
     get_current_active_superuser,
+    get_cursor_id,
 )
+from app.core.conditional import conditional_response, make_etag
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.outbox import email_outbox
+from app.core.security import get_password_hash_async, verify_password_async
 from app.models import (
     Item,
     Message,
@@ -24,7 +31,7 @@ from app.models import (
     UserUpdate,
     UserUpdateMe,
 )
-from app.utils import generate_new_account_email, send_email
+from app.utils import encode_cursor, generate_new_account_email
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -34,40 +41,86 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_users(
+    request: Request,
+    session: AsyncSessionDep,
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    count: crud.CountStrategy = "exact",
+) -> Any:
     """
     Retrieve users.
+
+    Pass the `next_cursor` of a previous page as `cursor` to seek directly to
+    the following page instead of using `skip`. Use `count` to get a cached or
+    estimated total instead of an exact one, or `none` to skip counting.
+
+    Pages carry an `ETag`, send it back in `If-None-Match` to get a `304 Not
+    Modified` response when the page didn't change.
     """
+    cache_key = None
+    if settings.LIST_CACHE_TTL_SECONDS:
+        cache_key = await crud.get_list_page_key_async(
+            table="user", query=str(request.query_params)
+        )
+        cached = await crud.get_cached_list_page_async(key=cache_key)
+        if cached:
+            etag, content = cached
+            return conditional_response(request, content, etag=etag)
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    total = await crud.count_users_async(session=session, strategy=count)
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    statement = (
+        select(*crud.USER_PUBLIC_COLUMNS, col(User.version))
+        .order_by(col(User.id))
+        .limit(limit)
+    )
+    if cursor:
+        after_id = get_cursor_id(cursor)
+        statement = statement.where(col(User.id) > after_id)
+    else:
+        statement = statement.offset(skip)
+    rows = await crud.fetch_rows_async(session=session, statement=statement)
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].id)
 
-    return UsersPublic(data=users, count=count)
+    etag = make_etag(total, next_cursor, *(f"{row.id}.{row.version}" for row in rows))
+    data = [row._asdict() for row in rows]
+    for user in data:
+        del user["version"]
+    # The rows have the fields of UserPublic, encode them directly instead of
+    # validating them again through the response model
+    content = orjson.dumps(
+        {"data": data, "count": total, "next_cursor": next_cursor},
+        option=orjson.OPT_UTC_Z,
+    )
+    if cache_key:
+        await crud.cache_list_page_async(key=cache_key, etag=etag, content=content)
+    return conditional_response(request, content, etag=etag)
 
 
 @router.post(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
 )
-def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
+async def create_user(*, session: AsyncSessionDep, user_in: UserCreate) -> Any:
     """
     Create new user.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await crud.get_user_by_email_async(session=session, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
 
-    user = crud.create_user(session=session, user_create=user_in)
+    user = await crud.create_user_async(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        send_email(
+        email_outbox.enqueue(
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -76,15 +129,17 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
 
 
 @router.patch("/me", response_model=UserPublic)
-def update_user_me(
-    *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
+async def update_user_me(
+    *, session: AsyncSessionDep, user_in: UserUpdateMe, current_user: CurrentDBUser
 ) -> Any:
     """
     Update own user.
     """
 
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await crud.get_user_by_email_async(
+            session=session, email=user_in.email
+        )
         if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
@@ -92,41 +147,54 @@ def update_user_me(
     user_data = user_in.model_dump(exclude_unset=True)
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    await crud.invalidate_cached_user_async(user_id=current_user.id)
+    await crud.invalidate_cached_lists_async(table="user")
     return current_user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
-    *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
+async def update_password_me(
+    *, session: AsyncSessionDep, body: UpdatePassword, current_user: CurrentDBUser
 ) -> Any:
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await verify_password_async(
+        body.current_password, current_user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await get_password_hash_async(body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
-    session.commit()
+    await crud.revoke_refresh_tokens_async(session=session, user_id=current_user.id)
+    await session.commit()
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+async def read_user_me(request: Request, current_user: CurrentUserPublic) -> Any:
     """
     Get current user.
+
+    Send the `ETag` of a previous response in `If-None-Match` to get a `304 Not
+    Modified` response when the user didn't change.
     """
-    return current_user
+    return conditional_response(
+        request,
+        current_user.model_dump(exclude={"version", "updated_at"}),
+        etag=make_etag(current_user.id, current_user.version),
+        last_modified=current_user.updated_at,
+    )
 
 
 @router.delete("/me", response_model=Message)
-def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+async def delete_user_me(session: AsyncSessionDep, current_user: CurrentDBUser) -> Any:
     """
     Delete own user.
     """
@@ -134,43 +202,62 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
-    session.commit()
+    user_id = current_user.id
+    await session.delete(current_user)
+    await session.commit()
+    await crud.invalidate_cached_user_async(user_id=user_id)
+    crud.invalidate_item_count(owner_id=user_id)
+    crud.invalidate_user_count()
+    await crud.invalidate_cached_lists_async(table="user")
+    await crud.invalidate_cached_lists_async(table="item")
     return Message(message="User deleted successfully")
 
 
 @router.post("/signup", response_model=UserPublic)
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
+async def register_user(session: AsyncSessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await crud.get_user_by_email_async(session=session, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system",
         )
     user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
+    user = await crud.create_user_async(session=session, user_create=user_create)
     return user
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-def read_user_by_id(
-    user_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+async def read_user_by_id(
+    request: Request,
+    user_id: uuid.UUID,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
 ) -> Any:
     """
     Get a specific user by id.
+
+    Send the `ETag` of a previous response in `If-None-Match` to get a `304 Not
+    Modified` response when the user didn't change.
     """
-    user = session.get(User, user_id)
-    if user == current_user:
-        return user
-    if not current_user.is_superuser:
+    if user_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(
             status_code=403,
             detail="The user doesn't have enough privileges",
         )
-    return user
+    user = await crud.get_user_public_async(session=session, user_id=user_id)
+    if not user:
+        return None
+    content = user._asdict()
+    version, updated_at = content.pop("version"), content.pop("updated_at")
+    return conditional_response(
+        request,
+        content,
+        etag=make_etag(user.id, version),
+        last_modified=updated_at,
+    )
 
 
 @router.patch(
@@ -178,9 +265,9 @@ def read_user_by_id(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UserPublic,
 )
-def update_user(
+async def update_user(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: uuid.UUID,
     user_in: UserUpdate,
 ) -> Any:
@@ -188,39 +275,48 @@ def update_user(
     Update a user.
     """
 
-    db_user = session.get(User, user_id)
+    db_user = await session.get(User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await crud.get_user_by_email_async(
+            session=session, email=user_in.email
+        )
         if existing_user and existing_user.id != user_id:
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
             )
 
-    db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    db_user = await crud.update_user_async(
+        session=session, db_user=db_user, user_in=user_in
+    )
     return db_user
 
 
 @router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
-def delete_user(
-    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+async def delete_user(
+    session: AsyncSessionDep, current_user: CurrentUser, user_id: uuid.UUID
 ) -> Message:
     """
     Delete a user.
     """
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
     statement = delete(Item).where(col(Item.owner_id) == user_id)
-    session.exec(statement)  # type: ignore
-    session.delete(user)
-    session.commit()
+    await session.exec(statement)  # type: ignore
+    await session.delete(user)
+    await session.commit()
+    await crud.invalidate_cached_user_async(user_id=user_id)
+    crud.invalidate_item_count(owner_id=user_id)
+    crud.invalidate_user_count()
+    await crud.invalidate_cached_lists_async(table="user")
+    await crud.invalidate_cached_lists_async(table="item")
     return Message(message="User deleted successfully")
@@ -1,9 +1,13 @@
+from dataclasses import asdict
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
-from app.utils import generate_test_email, send_email
+from app.core.db import async_engine, get_pool_stats
+from app.core.outbox import email_outbox
+from app.models import DatabasePoolStats, EmailOutboxStats, Message
+from app.utils import generate_test_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
@@ -13,12 +17,12 @@ router = APIRouter(prefix="/utils", tags=["utils"])
     dependencies=[Depends(get_current_active_superuser)],
     status_code=201,
 )
-def test_email(email_to: EmailStr) -> Message:
+async def test_email(email_to: EmailStr) -> Message:
     """
     Test emails.
     """
     email_data = generate_test_email(email_to=email_to)
-    send_email(
+    email_outbox.enqueue(
         email_to=email_to,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -26,6 +30,32 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/db-pool/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def db_pool() -> DatabasePoolStats:
+    """
+    Database connection pool usage of this worker process.
+    """
+    return DatabasePoolStats(**get_pool_stats(async_engine))
+
+
+@router.get(
+    "/email-outbox/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def email_outbox_stats() -> EmailOutboxStats:
+    """
+    Email outbox queue and delivery counters of this worker process.
+    """
+    return EmailOutboxStats(
+        queued=email_outbox.queued,
+        retrying=email_outbox.retrying,
+        **asdict(email_outbox.metrics),
+    )
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
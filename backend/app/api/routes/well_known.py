@@ -0,0 +1,19 @@
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+
+from app.core.security import jwt_keys
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+
+@router.get("/jwks.json")
+def read_jwks() -> Any:
+    """
+    Public keys verifying the access tokens, selected by the `kid` header of the
+    token.
+    """
+    return ORJSONResponse(
+        jwt_keys.jwks(), headers={"Cache-Control": "public, max-age=300"}
+    )
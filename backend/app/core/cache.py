@@ -0,0 +1,134 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Protocol, TypeVar
+
+from app.core.config import settings
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe in-process LRU cache whose entries also expire after a TTL.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(Protocol):
+    """
+    Async string key-value store used for caches that can be shared by workers.
+    """
+
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def incr(self, key: str, ttl: float) -> int:
+        """
+        Increment the integer stored at `key`, starting from 0 with the given
+        expiration if it doesn't exist, and return the new value.
+        """
+        ...
+
+
+class MemoryCacheBackend:
+    """
+    Per-process backend, invalidations don't reach the other workers.
+    """
+
+    def __init__(self, *, maxsize: int) -> None:
+        self._cache: TTLCache[str, str] = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        # Atomic under asyncio, there's no await between the read and the write.
+        # Unlike Redis the expiration is renewed on each increment
+        value = int(self._cache.get(key) or 0) + 1
+        self._cache.set(key, str(value), ttl=ttl)
+        return value
+
+
+class RedisCacheBackend:
+    """
+    Backend for a `redis.asyncio.Redis` compatible client, shared by all workers.
+    """
+
+    def __init__(self, client: Any, *, prefix: str = "") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        value = await self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        value = int(await self.client.incr(self.prefix + key))
+        if value == 1:
+            await self.client.pexpire(self.prefix + key, max(int(ttl * 1000), 1))
+        return value
+
+
+def create_cache_backend(*, prefix: str, maxsize: int) -> CacheBackend:
+    if settings.REDIS_URL:
+        # Optional dependency, only needed when a shared cache is configured
+        redis_asyncio = importlib.import_module("redis.asyncio")
+        client = redis_asyncio.from_url(settings.REDIS_URL)
+        return RedisCacheBackend(client, prefix=prefix)
+    return MemoryCacheBackend(maxsize=maxsize)
@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Strong entity tag of the representation identified by `parts`, e.g. the ID
+    and row version of a resource.
+    """
+    digest = hashlib.sha256("\0".join(str(part) for part in parts).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_not_modified(
+    headers: Headers, *, etag: str, last_modified: datetime | None = None
+) -> bool:
+    """
+    Whether the client's copy is current, per the `If-None-Match` header or,
+    without it, the `If-Modified-Since` one (RFC 9110, section 13.2.2).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # GET compares weakly, a weak tag matches the strong one
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have a one second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    content: Any,
+    *,
+    etag: str,
+    last_modified: datetime | None = None,
+) -> Response:
+    """
+    JSON response validated by the client's cache, or `304 Not Modified` when
+    its copy is current. `content` is encoded unless it's already bytes.
+    """
+    headers = {
+        "ETag": etag,
+        # Kept by the browser but revalidated on each use, the responses depend
+        # on the user
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    if is_not_modified(request.headers, etag=etag, last_modified=last_modified):
+        return Response(status_code=304, headers=headers)
+    if not isinstance(content, bytes):
+        # UTC datetimes end in "Z", as in the responses encoded by pydantic
+        content = orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return Response(content, media_type="application/json", headers=headers)
@@ -32,8 +32,33 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Access tokens carry the user state, a deactivated user keeps access
+    # until its token expires
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # PEM files of the Ed25519 or EC P-256 private keys of the access tokens,
+    # the first one signs and the others only verify. Without them the key is
+    # derived from SECRET_KEY
+    JWT_PRIVATE_KEY_FILES: Annotated[list[str], BeforeValidator(parse_cors)] = []
+    # Verified access tokens kept per worker to skip decoding them again
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+    # Password hash schemes, the first one hashes new passwords and the others
+    # are only verified. Hashes of the other schemes or of other costs are
+    # replaced on login
+    PASSWORD_HASH_SCHEMES: Annotated[list[str], BeforeValidator(parse_cors)] = [
+        "argon2",
+        "bcrypt",
+    ]
+    # Argon2id memory in KiB, passes and lanes of each hash
+    ARGON2_MEMORY_COST: int = 19_456
+    ARGON2_TIME_COST: int = 2
+    ARGON2_PARALLELISM: int = 1
+    BCRYPT_ROUNDS: int = 12
+    # Worker processes per API process that hash and verify passwords, 0 hashes
+    # in the threadpool instead
+    PASSWORD_HASH_WORKERS: int = 1
+    # Hash requests allowed to queue per API process before answering 503
+    PASSWORD_HASH_MAX_PENDING: int = 32
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -50,6 +75,16 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
+    # Share of the requests traced, unless their route ID has its own rate or
+    # the upstream service decided. Errors are reported regardless
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.1
+    SENTRY_ROUTE_TRACES_SAMPLE_RATES: dict[str, float] = {
+        "utils-health_check": 0.0,
+        "login-login_access_token": 1.0,
+        "login-refresh_access_token": 1.0,
+    }
+    # Share of the traced requests also profiled, 0 disables the profiler
+    SENTRY_PROFILES_SAMPLE_RATE: float = 0.0
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str
@@ -68,6 +103,53 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool of each worker process, see SQLAlchemy's QueuePool
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    POSTGRES_POOL_RECYCLE: int = -1
+    POSTGRES_POOL_PRE_PING: bool = False
+    # Leave pooling to PgBouncer (transaction mode): no local pool and no
+    # server-side prepared statements
+    POSTGRES_PGBOUNCER: bool = False
+    # Requests running more statements, or the same one more times, are logged
+    # as warnings. A repeated statement usually is an N+1 query
+    QUERY_COUNT_WARNING_THRESHOLD: int = 20
+    QUERY_REPEAT_WARNING_THRESHOLD: int = 5
+    # Report the statements and database time of each request in a
+    # Server-Timing response header
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Shared cache for all the workers, each worker caches in memory if not set
+    REDIS_URL: str | None = None
+    # Seconds the authenticated user is trusted without reading it from the DB
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10_000
+
+    # Maximum number of items accepted by the bulk item endpoints
+    ITEMS_BULK_MAX_SIZE: int = 1000
+    # Rows loaded per COPY by the item import, and rejected rows it reports
+    ITEMS_IMPORT_BATCH_SIZE: int = 5000
+    ITEMS_IMPORT_MAX_ERRORS: int = 100
+
+    # Seconds a cached list count (`?count=cached`) is reused before recounting
+    COUNT_CACHE_TTL_SECONDS: int = 30
+    # Seconds the list pages read by superusers are cached, shared by the
+    # workers through REDIS_URL when set. Writes to the listed table invalidate
+    # them, 0 disables the cache
+    LIST_CACHE_TTL_SECONDS: int = 0
+    LIST_CACHE_MAX_SIZE: int = 1000
+
+    # Requests allowed per client IP and per account in the rate limit window,
+    # 0 disables a limit. Shared by the workers through REDIS_URL when set
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    # Only the failed logins count towards the per account limit
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: int = 5
+    PASSWORD_RECOVERY_RATE_LIMIT_PER_IP: int = 5
+    PASSWORD_RECOVERY_RATE_LIMIT_PER_ACCOUNT: int = 2
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -84,6 +166,13 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Check the email templates for changes on each use, for local development
+    EMAIL_TEMPLATES_AUTO_RELOAD: bool = False
+    # Background senders, each with its own SMTP connection, emails that can
+    # wait in the outbox and retries of temporary delivery failures
+    EMAIL_OUTBOX_WORKERS: int = 2
+    EMAIL_OUTBOX_MAX_SIZE: int = 1000
+    EMAIL_OUTBOX_MAX_RETRIES: int = 3
 
     @computed_field  # type: ignore[prop-decorator]
     @property
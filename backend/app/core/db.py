@@ -1,10 +1,179 @@
-from sqlmodel import Session, create_engine, select
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Connection, Engine, event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    NullPool,
+    PoolProxiedConnection,
+    QueuePool,
+)
+from sqlmodel import Session, create_engine
 
 from app import crud
+from app.core import metrics
 from app.core.config import settings
-from app.models import User, UserCreate
+from app.models import UserCreate
+
+
+class PoolMetrics:
+    """
+    Connection checkout counters of a pool, per worker process.
+    """
+
+    def __init__(self, pool: str) -> None:
+        self.pool = pool
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def observe_checkout(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        metrics.db_checkout_wait.labels(self.pool).observe(wait_seconds)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+        metrics.db_checkout_timeouts.labels(self.pool).inc()
+
+
+def _metered_connect(
+    metrics: PoolMetrics, connect: Callable[[], PoolProxiedConnection]
+) -> PoolProxiedConnection:
+    start = time.perf_counter()
+    try:
+        connection = connect()
+    except exc.TimeoutError:
+        metrics.observe_timeout()
+        raise
+    metrics.observe_checkout(time.perf_counter() - start)
+    return connection
+
+
+# The metrics are class attributes because pools are re-instantiated on dispose
+class MeteredQueuePool(QueuePool):
+    metrics = PoolMetrics("sync")
+
+    def connect(self) -> PoolProxiedConnection:
+        return _metered_connect(self.metrics, super().connect)
+
+
+class MeteredAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    metrics = PoolMetrics("async")
+
+    def connect(self) -> PoolProxiedConnection:
+        return _metered_connect(self.metrics, super().connect)
+
+
+def get_engine_options(*, use_async: bool = False) -> dict[str, Any]:
+    if settings.POSTGRES_PGBOUNCER:
+        return {"poolclass": NullPool, "connect_args": {"prepare_threshold": None}}
+    return {
+        "poolclass": MeteredAsyncAdaptedQueuePool if use_async else MeteredQueuePool,
+        "pool_size": settings.POSTGRES_POOL_SIZE,
+        "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+        "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+        "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+    }
+
+
+def get_pool_stats(db_engine: Engine | AsyncEngine) -> dict[str, Any]:
+    pool = db_engine.pool
+    stats: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, MeteredQueuePool | MeteredAsyncAdaptedQueuePool):
+        metrics = pool.metrics
+        stats.update(
+            checkouts=metrics.checkouts,
+            timeouts=metrics.timeouts,
+            wait_seconds_total=metrics.wait_seconds_total,
+            wait_seconds_max=metrics.wait_seconds_max,
+        )
+    return stats
+
+
+@dataclass
+class QueryStats:
+    """
+    Statements run during a request and the time spent running them.
+    """
+
+    count: int = 0
+    duration: float = 0.0
+    # Times each statement ran, the same one many times hints at an N+1 query
+    statements: Counter[str] = field(default_factory=Counter)
+
+
+# Set for each request, the statements run outside of one aren't tracked. Async
+# sessions run their statements in a greenlet that shares the request context
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+
+def _before_cursor_execute(conn: Connection, *_args: Any) -> None:
+    if query_stats.get() is not None:
+        conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Connection, _cursor: Any, statement: str, *_args: Any
+) -> None:
+    stats = query_stats.get()
+    if stats is None or "query_start" not in conn.info:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - conn.info.pop("query_start")
+    stats.statements[statement] += 1
+
+
+def track_engine_queries(db_engine: Engine) -> None:
+    event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def track_engine_connections(db_engine: Engine, pool: str) -> None:
+    checked_out = metrics.db_connections_checked_out.labels(pool)
+    event.listen(db_engine, "checkout", lambda *_args: checked_out.inc())
+    event.listen(db_engine, "checkin", lambda *_args: checked_out.dec())
+
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **get_engine_options())
+# Used by the API, psycopg picks its async implementation for the same URL
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), **get_engine_options(use_async=True)
+)
+track_engine_queries(engine)
+track_engine_queries(async_engine.sync_engine)
+track_engine_connections(engine, "sync")
+track_engine_connections(async_engine.sync_engine, "async")
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -21,9 +190,7 @@ def init_db(session: Session) -> None:
     # This works because the models are already imported and registered from app.models
     # SQLModel.metadata.create_all(engine)
 
-    user = session.exec(
-        select(User).where(User.email == settings.FIRST_SUPERUSER)
-    ).first()
+    user = crud.get_user_by_email(session=session, email=settings.FIRST_SUPERUSER)
     if not user:
         user_in = UserCreate(
             email=settings.FIRST_SUPERUSER,
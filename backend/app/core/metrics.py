@@ -0,0 +1,69 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set, which has to happen before prometheus_client
+# is imported, each worker process writes its samples to files of that directory
+# and any worker serves the aggregate. The directory must be emptied before the
+# workers start
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Duration of the HTTP requests, by route ID",
+    ["route", "method", "status"],
+)
+requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    multiprocess_mode="livesum",
+)
+db_connections_checked_out = Gauge(
+    "db_pool_connections_checked_out",
+    "Database connections checked out of the pools",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+db_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time waited to check out a database connection",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+db_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts",
+    "Database connection checkouts that timed out",
+    ["pool"],
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Duration of the password hash operations, including their wait in the queue",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+email_send_duration = Histogram(
+    "email_send_duration_seconds",
+    "Duration of the SMTP delivery of each email",
+    ["outcome"],
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    # Drops the live gauges of this worker when it exits
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
@@ -0,0 +1,128 @@
+import logging
+import time
+from collections.abc import Callable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.db import QueryStats, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+def format_server_timing(stats: QueryStats, duration: float) -> str:
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={duration * 1000:.1f}"
+    )
+
+
+def log_query_stats(
+    scope: Scope, status_code: int, stats: QueryStats, duration: float
+) -> None:
+    fields = {
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status_code,
+        "queries": stats.count,
+        "db_ms": round(stats.duration * 1000, 1),
+        "duration_ms": round(duration * 1000, 1),
+    }
+    message = " ".join(f"{key}={value}" for key, value in fields.items())
+    repeated_statement, repeats = next(iter(stats.statements.most_common(1)), ("", 0))
+    if (
+        stats.count > settings.QUERY_COUNT_WARNING_THRESHOLD
+        or repeats >= settings.QUERY_REPEAT_WARNING_THRESHOLD
+    ):
+        logger.warning(
+            f"Too many queries {message} repeats={repeats}: {repeated_statement}",
+            extra=fields,
+        )
+    else:
+        logger.debug(message, extra=fields)
+
+
+class QueryStatsMiddleware:
+    """
+    Count the statements run by each request and the time they take, reported
+    in a `Server-Timing` header and logged. Statements run while a streaming
+    response is sent are logged but miss the header, sent before them.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if settings.SERVER_TIMING_ENABLED:
+                        MutableHeaders(scope=message).append(
+                            "Server-Timing",
+                            format_server_timing(stats, time.perf_counter() - start),
+                        )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                log_query_stats(scope, status_code, stats, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Record the duration of each request by the ID of its route, the one of its
+    OpenAPI operation, and count the requests in progress. The ID is made by
+    `route_id`, the app's unique ID function, as the routes seen here may be
+    the ones of the included routers, with IDs of their own.
+    """
+
+    def __init__(
+        self, app: ASGIApp, route_id: Callable[[APIRoute], str] | None = None
+    ) -> None:
+        self.app = app
+        self.route_id = route_id
+
+    def get_route_label(self, scope: Scope) -> str:
+        # Set by the router, unmatched paths share a label to bound the series
+        route = scope.get("route")
+        if route is None:
+            return "unmatched"
+        if isinstance(route, APIRoute):
+            if self.route_id and route.tags:
+                return self.route_id(route)
+            return route.unique_id
+        return str(getattr(route, "name", None) or "unmatched")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.requests_in_progress.dec()
+            metrics.request_duration.labels(
+                self.get_route_label(scope), scope["method"], str(status_code)
+            ).observe(time.perf_counter() - start)
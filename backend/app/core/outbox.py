@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import smtplib
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import emails  # type: ignore
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxFullError(Exception):
+    pass
+
+
+@dataclass
+class OutgoingEmail:
+    email_to: str
+    subject: str
+    html_content: str
+    attempts: int = 0
+
+
+@dataclass
+class EmailOutboxMetrics:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    connections_opened: int = 0
+
+
+class SMTPConnection:
+    """
+    Persistent SMTP connection, opened on the first message and reused for the
+    following ones until it's closed or fails. It's blocking, each worker of
+    the outbox uses its own from a thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        tls: bool = False,
+        ssl: bool = False,
+        user: str | None = None,
+        password: str | None = None,
+        mail_from: tuple[str | None, str],
+        timeout: float = 10,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.ssl = ssl
+        self.user = user
+        self.password = password
+        self.mail_from = mail_from
+        self.timeout = timeout
+        # Number of times the connection was (re)opened
+        self.opened = 0
+        self._smtp: smtplib.SMTP | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._smtp is not None
+
+    def open(self) -> None:
+        # As with the emails library, STARTTLS takes precedence over SSL
+        smtp_class = smtplib.SMTP_SSL if self.ssl and not self.tls else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.tls:
+                smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password or "")
+        except BaseException:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.opened += 1
+
+    def send(self, email: OutgoingEmail) -> None:
+        if self._smtp is None:
+            self.open()
+        assert self._smtp is not None
+        message = emails.Message(
+            subject=email.subject,
+            html=email.html_content,
+            mail_from=self.mail_from,
+            mail_to=email.email_to,
+        )
+        try:
+            self._smtp.sendmail(
+                self.mail_from[1], [email.email_to], message.as_string()
+            )
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+def create_smtp_connection() -> SMTPConnection:
+    assert (
+        settings.SMTP_HOST and settings.EMAILS_FROM_EMAIL
+    ), "no provided configuration for email variables"
+    return SMTPConnection(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        tls=settings.SMTP_TLS,
+        ssl=settings.SMTP_SSL,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    )
+
+
+def is_permanent_error(error: Exception) -> bool:
+    # Rejected addresses and 5xx replies won't succeed on a retry
+    if isinstance(error, smtplib.SMTPRecipientsRefused | smtplib.SMTPSenderRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    # Other SMTP and network errors are retried, anything else is a bad message
+    return not isinstance(error, OSError)
+
+
+class EmailOutbox:
+    """
+    Queue of emails sent in the background by `workers` tasks, so requests
+    don't wait for the mail server.
+
+    Each worker keeps its own SMTP connection open between messages, closing
+    it after `idle_timeout` seconds without any, and sends up to `batch_size`
+    queued messages at a time. Temporary failures are retried up to
+    `max_retries` times with exponential backoff from `retry_delay` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        connection_factory: Callable[[], SMTPConnection],
+        workers: int,
+        max_size: int,
+        max_retries: int,
+        batch_size: int = 20,
+        retry_delay: float = 1,
+        idle_timeout: float = 30,
+    ) -> None:
+        self.connection_factory = connection_factory
+        self.workers = workers
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.metrics = EmailOutboxMetrics()
+        # Created on start, an asyncio queue is bound to the running loop
+        self._queue: asyncio.Queue[OutgoingEmail] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._retries: set[asyncio.Task[None]] = set()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def retrying(self) -> int:
+        return len(self._retries)
+
+    def enqueue(self, *, email_to: str, subject: str, html_content: str) -> None:
+        assert settings.emails_enabled, "no provided configuration for email variables"
+        if self._queue is None:
+            raise RuntimeError("The email outbox is not running")
+        try:
+            self._queue.put_nowait(
+                OutgoingEmail(
+                    email_to=email_to, subject=subject, html_content=html_content
+                )
+            )
+        except asyncio.QueueFull:
+            raise EmailOutboxFullError()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Wait up to `timeout` seconds for the queued emails to be sent, then
+        stop the workers, dropping what's left.
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(self._queue), timeout)
+        except asyncio.TimeoutError:
+            pass
+        dropped = self.queued + self.retrying
+        if dropped:
+            logger.warning(f"Email outbox stopped, {dropped} emails not sent")
+        for task in [*self._tasks, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries = set()
+        self._queue = None
+
+    async def _drain(self, queue: asyncio.Queue[OutgoingEmail]) -> None:
+        while True:
+            await queue.join()
+            if not self._retries:
+                return
+            await asyncio.wait(set(self._retries))
+
+    async def _next_batch(
+        self, queue: asyncio.Queue[OutgoingEmail], connection: SMTPConnection | None
+    ) -> list[OutgoingEmail]:
+        if connection is not None and connection.is_open:
+            try:
+                first = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(connection.close)
+                first = await queue.get()
+        else:
+            first = await queue.get()
+        batch = [first]
+        while len(batch) < self.batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch
+
+    @staticmethod
+    def _send_batch(
+        connection: SMTPConnection, batch: list[OutgoingEmail]
+    ) -> list[tuple[OutgoingEmail, Exception]]:
+        errors = []
+        for email in batch:
+            start = time.perf_counter()
+            try:
+                connection.send(email)
+            except Exception as e:
+                errors.append((email, e))
+                outcome = "failed"
+            else:
+                outcome = "sent"
+            metrics.email_send_duration.labels(outcome).observe(
+                time.perf_counter() - start
+            )
+        return errors
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        connection: SMTPConnection | None = None
+        try:
+            while True:
+                batch = await self._next_batch(queue, connection)
+                if connection is None:
+                    # Created with the first email, the SMTP settings may not be
+                    # set when emails aren't used
+                    connection = self.connection_factory()
+                opened = connection.opened
+                try:
+                    errors = await asyncio.to_thread(
+                        self._send_batch, connection, batch
+                    )
+                finally:
+                    for _ in batch:
+                        queue.task_done()
+                self.metrics.sent += len(batch) - len(errors)
+                self.metrics.connections_opened += connection.opened - opened
+                for email, error in errors:
+                    self._handle_error(queue, email, error)
+        finally:
+            if connection is not None:
+                await asyncio.to_thread(connection.close)
+
+    def _handle_error(
+        self,
+        queue: asyncio.Queue[OutgoingEmail],
+        email: OutgoingEmail,
+        error: Exception,
+    ) -> None:
+        email.attempts += 1
+        if is_permanent_error(error) or email.attempts > self.max_retries:
+            self.metrics.failed += 1
+            logger.error(f"Failed to send email to {email.email_to}: {error!r}")
+            return
+        self.metrics.retried += 1
+        delay = self.retry_delay * 2 ** (email.attempts - 1)
+        task = asyncio.create_task(self._retry_later(queue, email, delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _retry_later(
+        self, queue: asyncio.Queue[OutgoingEmail], email: OutgoingEmail, delay: float
+    ) -> None:
+        await asyncio.sleep(delay)
+        await queue.put(email)
+
+
+email_outbox = EmailOutbox(
+    connection_factory=create_smtp_connection,
+    workers=settings.EMAIL_OUTBOX_WORKERS,
+    max_size=settings.EMAIL_OUTBOX_MAX_SIZE,
+    max_retries=settings.EMAIL_OUTBOX_MAX_RETRIES,
+)
@@ -0,0 +1,82 @@
+import time
+
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.config import settings
+
+
+class RateLimitExceededError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Sliding window rate limiter. Requests are counted per fixed window and the
+    count of the previous window is weighted by how much it still overlaps the
+    sliding one, which approximates a sliding log with two counters per key.
+
+    Rejected requests are counted too, so a client that keeps retrying stays
+    blocked until it slows down.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    async def _count(
+        self, key: str, *, window: float, increment: bool
+    ) -> tuple[float, float]:
+        """
+        The weighted count of `key` in the sliding window, after incrementing
+        it if `increment`, and the seconds left in the current fixed window.
+        """
+        now = time.time()
+        index, offset = divmod(now, window)
+        current_key = f"{key}:{index:.0f}"
+        if increment:
+            current = await self.backend.incr(current_key, ttl=window * 2)
+        else:
+            current = int(await self.backend.get(current_key) or 0)
+        previous = int(await self.backend.get(f"{key}:{index - 1:.0f}") or 0)
+        return previous * (1 - offset / window) + current, window - offset
+
+    async def hit(self, key: str, *, limit: int, window: float) -> None:
+        count, retry_after = await self._count(key, window=window, increment=True)
+        if count > limit:
+            raise RateLimitExceededError(retry_after=retry_after)
+
+    async def check(self, key: str, *, limit: int, window: float) -> None:
+        """
+        Raise if `limit` requests were already counted, without counting this
+        one, for limits that only count some outcomes (e.g. failed logins).
+        """
+        count, retry_after = await self._count(key, window=window, increment=False)
+        if count >= limit:
+            raise RateLimitExceededError(retry_after=retry_after)
+
+
+rate_limiter = RateLimiter(create_cache_backend(prefix="ratelimit:", maxsize=100_000))
+
+
+async def rate_limit(key: str, *, limit: int) -> None:
+    """
+    Count a request for `key`, raising RateLimitExceededError once more than
+    `limit` were made in the last RATE_LIMIT_WINDOW_SECONDS. A limit of 0
+    disables it.
+    """
+    if not settings.RATE_LIMIT_ENABLED or limit <= 0:
+        return
+    await rate_limiter.hit(key, limit=limit, window=settings.RATE_LIMIT_WINDOW_SECONDS)
+
+
+async def check_rate_limit(key: str, *, limit: int) -> None:
+    """
+    Raise RateLimitExceededError if `limit` requests were already counted for
+    `key` with `rate_limit` in the last RATE_LIMIT_WINDOW_SECONDS, without
+    counting this one. A limit of 0 disables it.
+    """
+    if not settings.RATE_LIMIT_ENABLED or limit <= 0:
+        return
+    await rate_limiter.check(
+        key, limit=limit, window=settings.RATE_LIMIT_WINDOW_SECONDS
+    )
@@ -1,27 +1,273 @@
+import asyncio
+import base64
+import hashlib
+import json
+import multiprocessing
+import secrets
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from pathlib import Path
+from typing import Any, TypeVar
 
 import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ec import (
+    SECP256R1,
+    EllipticCurvePrivateKey,
+    EllipticCurvePublicKey,
+)
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey,
+)
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
+from app.core import metrics
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+def create_password_context(
+    *,
+    schemes: list[str],
+    argon2_memory_cost: int,
+    argon2_time_cost: int,
+    argon2_parallelism: int,
+    bcrypt_rounds: int,
+) -> CryptContext:
+    return CryptContext(
+        schemes=schemes,
+        # All but the first scheme
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__time_cost=argon2_time_cost,
+        argon2__parallelism=argon2_parallelism,
+        bcrypt__rounds=bcrypt_rounds,
+    )
 
+
+pwd_context = create_password_context(
+    schemes=settings.PASSWORD_HASH_SCHEMES,
+    argon2_memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2_time_cost=settings.ARGON2_TIME_COST,
+    argon2_parallelism=settings.ARGON2_PARALLELISM,
+    bcrypt_rounds=settings.BCRYPT_ROUNDS,
+)
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+class PasswordHashPool:
+    """
+    Runs password hashing in dedicated worker processes, so it doesn't hold the
+    GIL of the API process, and refuses new work once `max_pending` hashes are
+    already queued or running.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusyError()
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(func, *args)
+            if self._executor is None:
+                # Forking a process that already runs threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            metrics.password_hash_duration.labels(func.__name__).observe(
+                time.perf_counter() - start
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+# Password reset tokens are only verified by the API, signed with SECRET_KEY
 ALGORITHM = "HS256"
 
+SigningPrivateKey = Ed25519PrivateKey | EllipticCurvePrivateKey
+SigningPublicKey = Ed25519PublicKey | EllipticCurvePublicKey
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    private_key: SigningPrivateKey
+    public_key: SigningPublicKey
+    public_jwk: dict[str, Any]
+
+
+def create_signing_key(private_key: Any) -> SigningKey:
+    """
+    Wrap an Ed25519 or EC P-256 private key, identified by the RFC 7638
+    thumbprint of its public key.
+    """
+    public_key: SigningPublicKey
+    if isinstance(private_key, Ed25519PrivateKey):
+        algorithm = "EdDSA"
+        public_key = private_key.public_key()
+        jwk = OKPAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    elif isinstance(private_key, EllipticCurvePrivateKey) and isinstance(
+        private_key.curve, SECP256R1
+    ):
+        algorithm = "ES256"
+        public_key = private_key.public_key()
+        jwk = ECAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    else:
+        raise ValueError("JWT signing keys must be Ed25519 or EC P-256 keys")
+    required = {name: jwk[name] for name in ("crv", "kty", "x", "y") if name in jwk}
+    thumbprint = hashlib.sha256(
+        json.dumps(required, sort_keys=True, separators=(",", ":")).encode()
+    ).digest()
+    kid = base64.urlsafe_b64encode(thumbprint).rstrip(b"=").decode()
+    return SigningKey(
+        kid=kid,
+        algorithm=algorithm,
+        private_key=private_key,
+        public_key=public_key,
+        public_jwk={**jwk, "kid": kid, "alg": algorithm, "use": "sig"},
+    )
+
+
+class JWTKeys:
+    """
+    Keys of the access tokens. The first one signs the new tokens, the others
+    only verify the tokens they signed, until they expire. All of them are
+    published in the JWKS so other services can verify the tokens by `kid`.
+    """
+
+    def __init__(self, keys: list[SigningKey]) -> None:
+        if not keys:
+            raise ValueError("At least one JWT signing key is required")
+        self.keys = keys
+        self._by_kid = {key.kid: key for key in keys}
+
+    @property
+    def current(self) -> SigningKey:
+        return self.keys[0]
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
+    def get(self, kid: str | None) -> SigningKey | None:
+        return self._by_kid.get(kid) if kid else None
+
+    def jwks(self) -> dict[str, Any]:
+        return {"keys": [key.public_jwk for key in self.keys]}
+
+
+def load_jwt_keys() -> JWTKeys:
+    if settings.JWT_PRIVATE_KEY_FILES:
+        return JWTKeys(
+            [
+                create_signing_key(
+                    serialization.load_pem_private_key(
+                        Path(path).read_bytes(), password=None
+                    )
+                )
+                for path in settings.JWT_PRIVATE_KEY_FILES
+            ]
+        )
+    # Derived from SECRET_KEY so all the workers share it without configuration
+    seed = hashlib.sha256(f"jwt-signing-key:{settings.SECRET_KEY}".encode()).digest()
+    return JWTKeys([create_signing_key(Ed25519PrivateKey.from_private_bytes(seed))])
+
+
+jwt_keys = load_jwt_keys()
+
+
+def create_access_token(
+    subject: str | Any, expires_delta: timedelta, claims: dict[str, Any] | None = None
+) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
+    key = jwt_keys.current
+    encoded_jwt = jwt.encode(
+        to_encode, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid}
+    )
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict[str, Any]:
+    key = jwt_keys.get(jwt.get_unverified_header(token).get("kid"))
+    if key is None:
+        raise InvalidTokenError("Unknown signing key")
+    payload: dict[str, Any] = jwt.decode(
+        token, key.public_key, algorithms=[key.algorithm]
+    )
+    return payload
+
+
+def create_refresh_token() -> str:
+    # Opaque, only its hash is stored
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password, also returning a new hash of it when the stored one
+    uses a deprecated scheme or other costs than the current ones.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return await password_hash_pool.run(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
@@ -0,0 +1,55 @@
+import re
+from collections.abc import Callable
+from typing import Any
+
+from starlette.routing import compile_path
+
+
+class TracesSampler:
+    """
+    Sentry `traces_sampler` choosing the sample rate of each request from its
+    route ID, the `operationId` of the OpenAPI schema. Transactions start
+    before routing, so the request is matched against the schema paths, read
+    on the first request once all the routes are included.
+    """
+
+    def __init__(
+        self,
+        get_openapi: Callable[[], dict[str, Any]],
+        *,
+        default_rate: float,
+        route_rates: dict[str, float],
+    ) -> None:
+        self.get_openapi = get_openapi
+        self.default_rate = default_rate
+        self.route_rates = route_rates
+        self._routes: list[tuple[str, re.Pattern[str], str]] | None = None
+
+    def get_route_id(self, method: str, path: str) -> str | None:
+        if self._routes is None:
+            self._routes = [
+                (
+                    operation_method.upper(),
+                    compile_path(route_path)[0],
+                    operation["operationId"],
+                )
+                for route_path, operations in self.get_openapi()["paths"].items()
+                for operation_method, operation in operations.items()
+                if "operationId" in operation
+            ]
+        for route_method, pattern, route_id in self._routes:
+            if route_method == method and pattern.match(path):
+                return route_id
+        return None
+
+    def __call__(self, sampling_context: dict[str, Any]) -> float:
+        scope = sampling_context.get("asgi_scope")
+        if scope and scope["type"] == "http":
+            route_id = self.get_route_id(scope["method"], scope["path"])
+            if route_id in self.route_rates:
+                return self.route_rates[route_id]
+        # Follow the upstream service, so distributed traces are complete
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        return self.default_rate
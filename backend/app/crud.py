@@ -1,10 +1,97 @@
 import uuid
-from typing import Any
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal
 
-from sqlmodel import Session, select
+from psycopg.errors import ForeignKeyViolation
+from pydantic import ValidationError
+from sqlalchemy import (
+    Boolean,
+    ColumnClause,
+    ColumnElement,
+    Executable,
+    Row,
+    String,
+    Uuid,
+    case,
+    column,
+    values,
+)
+from sqlalchemy import select as sa_select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import (
+    Session,
+    SQLModel,
+    col,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.core.cache import TTLCache, create_cache_backend
+from app.core.config import settings
+from app.core.security import (
+    create_refresh_token,
+    get_password_hash,
+    get_password_hash_async,
+    hash_refresh_token,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
+from app.models import (
+    Item,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemPublic,
+    RefreshToken,
+    User,
+    UserCreate,
+    UserPublic,
+    UserPublicVersioned,
+    UserUpdate,
+)
+
+CountStrategy = Literal["exact", "cached", "estimate", "none"]
+
+# Keyed by (table name, owner id), the owner id is None for whole-table counts
+count_cache: TTLCache[tuple[str, uuid.UUID | None], int] = TTLCache(
+    maxsize=10_000, ttl=settings.COUNT_CACHE_TTL_SECONDS
+)
+# Public fields of authenticated users, keyed by user id
+user_cache = create_cache_backend(prefix="user:", maxsize=settings.USER_CACHE_MAX_SIZE)
+# Encoded list pages read by superusers, keyed by table, generation and query
+list_cache = create_cache_backend(prefix="list:", maxsize=settings.LIST_CACHE_MAX_SIZE)
+# Outlives the pages, pages cached before a generation expired are gone too
+LIST_GENERATION_TTL_SECONDS = 24 * 60 * 60
+
+
+def public_columns(model: type[SQLModel], public_model: type[SQLModel]) -> list[Any]:
+    return [col(getattr(model, name)) for name in public_model.model_fields]
+
+
+# Columns to select for responses, instead of loading whole ORM objects
+ITEM_PUBLIC_COLUMNS = public_columns(Item, ItemPublic)
+USER_PUBLIC_COLUMNS = public_columns(User, UserPublic)
+# Selected along the public columns for the ETag of the responses
+ITEM_VERSION_COLUMNS = [col(Item.version), col(Item.updated_at)]
+USER_VERSION_COLUMNS = [col(User.version), col(User.updated_at)]
+
+
+async def fetch_rows_async(
+    *, session: AsyncSession, statement: Executable
+) -> Sequence[Row[Any]]:
+    """
+    Run a column-projected query on the session connection, bypassing the ORM:
+    the rows are plain named tuples, nothing is instrumented or added to the
+    identity map.
+    """
+    connection = await session.connection()
+    return (await connection.execute(statement)).all()
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -14,6 +101,7 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    invalidate_user_count()
     return db_obj
 
 
@@ -31,8 +119,13 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     return db_user
 
 
+def email_matches(email: str) -> ColumnElement[bool]:
+    # Same expression as the ix_user_email_lower index, so lookups can use it
+    return func.lower(User.email) == func.lower(email)
+
+
 def get_user_by_email(*, session: Session, email: str) -> User | None:
-    statement = select(User).where(User.email == email)
+    statement = select(User).where(email_matches(email))
     session_user = session.exec(statement).first()
     return session_user
 
@@ -41,8 +134,14 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Upgrade the hash while the plain password is at hand
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        session.commit()
     return db_user
 
 
@@ -51,4 +150,468 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -
     session.add(db_item)
     session.commit()
     session.refresh(db_item)
+    invalidate_item_count(owner_id=owner_id)
+    return db_item
+
+
+async def create_user_async(*, session: AsyncSession, user_create: UserCreate) -> User:
+    hashed_password = await get_password_hash_async(user_create.password)
+    db_obj = User.model_validate(
+        user_create, update={"hashed_password": hashed_password}
+    )
+    session.add(db_obj)
+    await session.commit()
+    await session.refresh(db_obj)
+    invalidate_user_count()
+    await invalidate_cached_lists_async(table="user")
+    return db_obj
+
+
+async def update_user_async(
+    *, session: AsyncSession, db_user: User, user_in: UserUpdate
+) -> Any:
+    user_data = user_in.model_dump(exclude_unset=True)
+    extra_data = {}
+    if "password" in user_data:
+        password = user_data["password"]
+        hashed_password = await get_password_hash_async(password)
+        extra_data["hashed_password"] = hashed_password
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    session.add(db_user)
+    if "password" in user_data or user_data.get("is_active") is False:
+        await revoke_refresh_tokens_async(session=session, user_id=db_user.id)
+    await session.commit()
+    await session.refresh(db_user)
+    await invalidate_cached_user_async(user_id=db_user.id)
+    await invalidate_cached_lists_async(table="user")
+    return db_user
+
+
+async def get_user_by_email_async(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(email_matches(email))
+    session_user = (await session.exec(statement)).first()
+    return session_user
+
+
+async def get_user_public_async(
+    *, session: AsyncSession, user_id: uuid.UUID
+) -> Row[Any] | None:
+    statement = sa_select(*USER_PUBLIC_COLUMNS, *USER_VERSION_COLUMNS).where(
+        col(User.id) == user_id
+    )
+    rows = await fetch_rows_async(session=session, statement=statement)
+    return rows[0] if rows else None
+
+
+async def get_cached_user_async(
+    *, session: AsyncSession, user_id: str
+) -> UserPublicVersioned | None:
+    """
+    Get the public fields of a user, reading the database only on cache misses.
+    """
+    cached = await user_cache.get(user_id)
+    if cached is not None:
+        try:
+            return UserPublicVersioned.model_validate_json(cached)
+        except ValidationError:
+            # Cached by a previous release, read it again
+            pass
+    try:
+        row = await get_user_public_async(session=session, user_id=uuid.UUID(user_id))
+    except ValueError:
+        return None
+    if not row:
+        return None
+    user = UserPublicVersioned.model_validate(row._asdict())
+    await user_cache.set(
+        user_id, user.model_dump_json(), ttl=settings.USER_CACHE_TTL_SECONDS
+    )
+    return user
+
+
+async def invalidate_cached_user_async(*, user_id: uuid.UUID) -> None:
+    await user_cache.delete(str(user_id))
+
+
+async def authenticate_async(
+    *, session: AsyncSession, email: str, password: str
+) -> User | None:
+    db_user = await get_user_by_email_async(session=session, email=email)
+    if not db_user:
+        return None
+    verified, new_hash = await verify_and_update_password_async(
+        password, db_user.hashed_password
+    )
+    if not verified:
+        return None
+    if new_hash:
+        # Upgrade the hash while the plain password is at hand
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
+    return db_user
+
+
+async def create_refresh_token_async(
+    *, session: AsyncSession, user_id: uuid.UUID, family_id: uuid.UUID | None = None
+) -> str:
+    """
+    Issue a refresh token to the user, continuing the family of the token it
+    replaces or starting a new one.
+    """
+    if family_id is None:
+        # Logging in is a good time to forget the expired tokens of the user
+        statement = delete(RefreshToken).where(
+            col(RefreshToken.user_id) == user_id,
+            col(RefreshToken.expires_at) <= func.now(),
+        )
+        await session.exec(statement)  # type: ignore
+    token = create_refresh_token()
+    session.add(
+        RefreshToken(
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or uuid.uuid4(),
+            user_id=user_id,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    await session.commit()
+    return token
+
+
+async def rotate_refresh_token_async(
+    *, session: AsyncSession, token: str
+) -> tuple[User, str] | None:
+    """
+    Exchange a refresh token for a new one of the same family, along with the
+    active user it belongs to.
+
+    A token is used only once, using it again means it leaked: its whole family
+    is revoked, the client holding the latest token has to log in again.
+    """
+    token_hash = hash_refresh_token(token)
+    # Checking and marking the token in one statement keeps concurrent
+    # refreshes with the same token from both succeeding
+    statement = (
+        update(RefreshToken)
+        .where(
+            col(RefreshToken.token_hash) == token_hash,
+            col(RefreshToken.used).is_(False),
+            col(RefreshToken.expires_at) > func.now(),
+        )
+        .values(used=True)
+        .returning(col(RefreshToken.user_id), col(RefreshToken.family_id))
+    )
+    rows = await fetch_rows_async(session=session, statement=statement)
+    if not rows:
+        reused = delete(RefreshToken).where(
+            col(RefreshToken.family_id).in_(
+                select(RefreshToken.family_id).where(
+                    col(RefreshToken.token_hash) == token_hash,
+                    col(RefreshToken.used).is_(True),
+                )
+            )
+        )
+        await session.exec(reused)  # type: ignore
+        await session.commit()
+        return None
+    user_id, family_id = rows[0].user_id, rows[0].family_id
+    user = await session.get(User, user_id)
+    if not user or not user.is_active:
+        await session.commit()
+        return None
+    new_token = await create_refresh_token_async(
+        session=session, user_id=user_id, family_id=family_id
+    )
+    return user, new_token
+
+
+async def revoke_refresh_tokens_async(
+    *, session: AsyncSession, user_id: uuid.UUID
+) -> None:
+    """
+    Revoke all the refresh tokens of a user, in the transaction of the session.
+    """
+    statement = delete(RefreshToken).where(col(RefreshToken.user_id) == user_id)
+    await session.exec(statement)  # type: ignore
+
+
+class ItemOwnerNotFoundError(Exception):
+    pass
+
+
+@asynccontextmanager
+async def check_item_owner(session: AsyncSession) -> AsyncIterator[None]:
+    """
+    Raise `ItemOwnerNotFoundError` when the owner of the items doesn't exist,
+    the owner isn't read beforehand and may be deleted while their token is
+    still valid.
+    """
+    try:
+        yield
+    except (IntegrityError, ForeignKeyViolation) as e:
+        error = e.orig if isinstance(e, IntegrityError) else e
+        if not isinstance(error, ForeignKeyViolation):
+            raise
+        await session.rollback()
+        raise ItemOwnerNotFoundError() from e
+
+
+async def create_item_async(
+    *, session: AsyncSession, item_in: ItemCreate, owner_id: uuid.UUID
+) -> Item:
+    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
+    session.add(db_item)
+    async with check_item_owner(session):
+        await session.commit()
+    await session.refresh(db_item)
+    invalidate_item_count(owner_id=owner_id)
+    await invalidate_cached_lists_async(table="item")
     return db_item
+
+
+async def create_items_async(
+    *, session: AsyncSession, items_in: list[ItemCreate], owner_id: uuid.UUID
+) -> list[Item]:
+    """
+    Insert all the items with a single multi-row INSERT ... RETURNING.
+    """
+    if not items_in:
+        return []
+    rows = [
+        Item.model_validate(item_in, update={"owner_id": owner_id}).model_dump()
+        for item_in in items_in
+    ]
+    async with check_item_owner(session):
+        items = list(await session.scalars(insert(Item).returning(Item), rows))
+        await session.commit()
+    invalidate_item_count(owner_id=owner_id)
+    await invalidate_cached_lists_async(table="item")
+    return items
+
+
+async def copy_items_async(
+    *, session: AsyncSession, items_in: list[ItemCreate], owner_id: uuid.UUID
+) -> int:
+    """
+    Load the items with COPY ... FROM STDIN, much cheaper than INSERT for
+    large batches, and commit them.
+    """
+    if not items_in:
+        return 0
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    # The psycopg connection, COPY isn't part of the DBAPI
+    driver_connection = raw_connection.driver_connection
+    assert driver_connection is not None
+    async with check_item_owner(session):
+        async with driver_connection.cursor() as cursor:
+            async with cursor.copy(
+                "COPY item (id, title, description, owner_id) FROM STDIN"
+            ) as copy:
+                for item_in in items_in:
+                    await copy.write_row(
+                        (uuid.uuid4(), item_in.title, item_in.description, owner_id)
+                    )
+        await session.commit()
+    invalidate_item_count(owner_id=owner_id)
+    await invalidate_cached_lists_async(table="item")
+    return len(items_in)
+
+
+async def get_item_public_async(
+    *, session: AsyncSession, item_id: uuid.UUID
+) -> Row[Any] | None:
+    statement = sa_select(*ITEM_PUBLIC_COLUMNS, *ITEM_VERSION_COLUMNS).where(
+        col(Item.id) == item_id
+    )
+    rows = await fetch_rows_async(session=session, statement=statement)
+    return rows[0] if rows else None
+
+
+async def get_item_owners_async(
+    *, session: AsyncSession, ids: list[uuid.UUID]
+) -> dict[uuid.UUID, uuid.UUID]:
+    statement = select(Item.id, Item.owner_id).where(col(Item.id).in_(ids))
+    return dict((await session.exec(statement)).all())
+
+
+async def update_items_async(
+    *, session: AsyncSession, items_in: list[ItemBulkUpdate]
+) -> list[Item]:
+    """
+    Apply all the updates with a single UPDATE ... FROM (VALUES ...).
+
+    Each row carries a flag per column telling if that column was sent, so
+    every item only gets the fields that were set for it.
+    """
+    if not items_in:
+        return []
+    fields = {"title": String, "description": String}
+    columns: list[ColumnClause[Any]] = [column("id", Uuid)]
+    for name, type_ in fields.items():
+        columns += [column(name, type_), column(f"set_{name}", Boolean)]
+    rows = []
+    for item_in in items_in:
+        data = item_in.model_dump(exclude_unset=True, exclude={"id"})
+        row: list[Any] = [item_in.id]
+        for name in fields:
+            row += [data.get(name), name in data]
+        rows.append(tuple(row))
+    new_values = values(*columns, name="new_values").data(rows)
+    statement = (
+        update(Item)
+        .where(col(Item.id) == new_values.c.id)
+        .values(
+            {
+                name: case(
+                    (new_values.c[f"set_{name}"], new_values.c[name]),
+                    else_=getattr(Item, name),
+                )
+                for name in fields
+            }
+        )
+        .returning(Item)
+        .execution_options(synchronize_session=False)
+    )
+    items = list(await session.scalars(statement))
+    await session.commit()
+    await invalidate_cached_lists_async(table="item")
+    return items
+
+
+async def delete_items_async(
+    *, session: AsyncSession, ids: list[uuid.UUID]
+) -> list[uuid.UUID]:
+    if not ids:
+        return []
+    statement = delete(Item).where(col(Item.id).in_(ids)).returning(col(Item.id))
+    deleted_ids = list(await session.scalars(statement))
+    await session.commit()
+    await invalidate_cached_lists_async(table="item")
+    return deleted_ids
+
+
+async def stream_items_async(
+    *, session: AsyncSession, owner_id: uuid.UUID | None = None, batch_size: int = 1000
+) -> AsyncIterator[Sequence[Row[Any]]]:
+    """
+    Yield the public columns of the items in batches of `batch_size` rows, read
+    through a server-side cursor so memory doesn't grow with the table.
+    """
+    statement = (
+        sa_select(*ITEM_PUBLIC_COLUMNS)
+        .order_by(col(Item.created_at), col(Item.id))
+        .execution_options(yield_per=batch_size)
+    )
+    if owner_id is not None:
+        statement = statement.where(col(Item.owner_id) == owner_id)
+    result = await session.stream(statement)
+    async for rows in result.partitions():
+        yield rows
+
+
+async def _estimate_row_count(*, session: AsyncSession, table_name: str) -> int | None:
+    statement = text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name")
+    estimate = (await session.execute(statement, {"name": table_name})).scalar()
+    # reltuples is -1 until the table has been vacuumed or analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def count_items_async(
+    *,
+    session: AsyncSession,
+    owner_id: uuid.UUID | None = None,
+    strategy: CountStrategy = "exact",
+) -> int | None:
+    """
+    Count items, optionally only the ones of `owner_id`.
+
+    The planner estimate only exists for the whole table, owner scoped
+    `estimate` requests fall back to the cached count.
+    """
+    if strategy == "none":
+        return None
+    if strategy == "estimate" and owner_id is None:
+        estimate = await _estimate_row_count(session=session, table_name="item")
+        if estimate is not None:
+            return estimate
+    key = ("item", owner_id)
+    if strategy != "exact":
+        cached = count_cache.get(key)
+        if cached is not None:
+            return cached
+    statement = select(func.count()).select_from(Item)
+    if owner_id is not None:
+        statement = statement.where(Item.owner_id == owner_id)
+    count = (await session.exec(statement)).one()
+    count_cache.set(key, count)
+    return count
+
+
+async def count_users_async(
+    *, session: AsyncSession, strategy: CountStrategy = "exact"
+) -> int | None:
+    if strategy == "none":
+        return None
+    if strategy == "estimate":
+        estimate = await _estimate_row_count(session=session, table_name="user")
+        if estimate is not None:
+            return estimate
+    key = ("user", None)
+    if strategy != "exact":
+        cached = count_cache.get(key)
+        if cached is not None:
+            return cached
+    count = (await session.exec(select(func.count()).select_from(User))).one()
+    count_cache.set(key, count)
+    return count
+
+
+def invalidate_item_count(*, owner_id: uuid.UUID) -> None:
+    count_cache.delete(("item", owner_id))
+    count_cache.delete(("item", None))
+
+
+def invalidate_user_count() -> None:
+    count_cache.delete(("user", None))
+
+
+async def get_list_page_key_async(*, table: str, query: str) -> str:
+    """
+    Cache key of a list page of `table`, of its current generation.
+
+    Read before the page is, so a page read while a write is committed gets
+    cached under the outdated generation, where it's never found.
+    """
+    generation = await list_cache.get(f"{table}:generation") or "0"
+    return f"{table}:{generation}:{query}"
+
+
+async def get_cached_list_page_async(*, key: str) -> tuple[str, bytes] | None:
+    """
+    ETag and encoded content of a cached list page.
+    """
+    cached = await list_cache.get(key)
+    if cached is None:
+        return None
+    etag, _, content = cached.partition("\n")
+    return etag, content.encode()
+
+
+async def cache_list_page_async(*, key: str, etag: str, content: bytes) -> None:
+    await list_cache.set(
+        key, f"{etag}\n{content.decode()}", ttl=settings.LIST_CACHE_TTL_SECONDS
+    )
+
+
+async def invalidate_cached_lists_async(*, table: str) -> None:
+    if settings.LIST_CACHE_TTL_SECONDS:
+        # A new generation, instead of a counter that could start again at a
+        # value some pages are still cached under
+        await list_cache.set(
+            f"{table}:generation", uuid.uuid4().hex, ttl=LIST_GENERATION_TTL_SECONDS
+        )
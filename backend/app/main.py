@@ -1,25 +1,107 @@
+import math
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.routes import metrics, well_known
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.metrics import mark_process_dead
+from app.core.middleware import MetricsMiddleware, QueryStatsMiddleware
+from app.core.outbox import EmailOutboxFullError, email_outbox
+from app.core.ratelimit import RateLimitExceededError
+from app.core.security import PasswordHasherBusyError, password_hash_pool
+from app.core.tracing import TracesSampler
+from app.crud import ItemOwnerNotFoundError
+from app.utils import load_email_templates
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
-if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
-    sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    load_email_templates()
+    await email_outbox.start()
+    yield
+    await email_outbox.stop()
+    # Pooled async connections are bound to the event loop that opened them
+    await async_engine.dispose()
+    password_hash_pool.shutdown()
+    mark_process_dead()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+    sentry_sdk.init(
+        dsn=str(settings.SENTRY_DSN),
+        traces_sampler=TracesSampler(
+            app.openapi,
+            default_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+            route_rates=settings.SENTRY_ROUTE_TRACES_SAMPLE_RATES,
+        ),
+        profiles_sample_rate=settings.SENTRY_PROFILES_SAMPLE_RATE,
+    )
+
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(
+    _request: Request, _exc: PasswordHasherBusyError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password operations, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RateLimitExceededError)
+async def rate_limit_exceeded_handler(
+    _request: Request, exc: RateLimitExceededError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests, try again later"},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
+
+
+@app.exception_handler(EmailOutboxFullError)
+async def email_outbox_full_handler(
+    _request: Request, _exc: EmailOutboxFullError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many emails waiting to be sent, try again later"},
+        headers={"Retry-After": "5"},
+    )
+
+
+@app.exception_handler(ItemOwnerNotFoundError)
+async def item_owner_not_found_handler(
+    _request: Request, _exc: ItemOwnerNotFoundError
+) -> JSONResponse:
+    # The token of a deleted user is accepted until it expires
+    return JSONResponse(status_code=404, content={"detail": "User not found"})
+
+
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware, route_id=custom_generate_unique_id)
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -31,3 +113,6 @@ if settings.all_cors_origins:
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# Served at the root, where the JWT libraries of other services look for it
+app.include_router(well_known.router)
+app.include_router(metrics.router)
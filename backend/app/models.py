@@ -1,12 +1,13 @@
 import uuid
+from datetime import datetime, timezone
 
 from pydantic import EmailStr
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import DateTime, Field, Index, Relationship, SQLModel, func, text
 
 
 # Shared properties
 class UserBase(SQLModel):
-    email: EmailStr = Field(unique=True, index=True, max_length=255)
+    email: EmailStr = Field(max_length=255)
     is_active: bool = True
     is_superuser: bool = False
     full_name: str | None = Field(default=None, max_length=255)
@@ -41,9 +42,48 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
+    # Emails are unique and looked up regardless of case
+    __table_args__ = (
+        Index("ix_user_email_lower", func.lower(text("email")), unique=True),
+    )
+    # Read the new version and updated_at back with RETURNING on UPDATE, async
+    # sessions can't load expired attributes on access
+    __mapper_args__ = {"eager_defaults": True}
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
-    items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
+    # Incremented by every UPDATE, along with updated_at, for the ETag and
+    # Last-Modified of the responses
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"server_default": text("1"), "onupdate": text("version + 1")},
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": func.now(), "onupdate": func.now()},
+        nullable=False,
+    )
+    items: list["Item"] = Relationship(
+        back_populates="owner", cascade_delete=True, passive_deletes=True
+    )
+
+
+# Refresh tokens issued to a user, stored as the SHA-256 of the token. Each one
+# is used once, replaced by the next of the same family on refresh. Used ones
+# are kept until they expire to detect their reuse
+class RefreshToken(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    token_hash: str = Field(max_length=64, unique=True, index=True)
+    family_id: uuid.UUID = Field(index=True)
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    expires_at: datetime = Field(
+        sa_type=DateTime(timezone=True),  # type: ignore
+        nullable=False,
+    )
+    used: bool = False
 
 
 # Properties to return via API, id is always required
@@ -51,9 +91,16 @@ class UserPublic(UserBase):
     id: uuid.UUID
 
 
+# Public fields along with the row version, cached for authenticated users
+class UserPublicVersioned(UserPublic):
+    version: int
+    updated_at: datetime
+
+
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -74,10 +121,35 @@ class ItemUpdate(ItemBase):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
+    # Match the (created_at, id) order of the item lists, the owner one also
+    # serves the per-owner counts and deletes
+    __table_args__ = (
+        Index("ix_item_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_item_created_at_id", "created_at", "id"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
+    )
+    # Incremented by every UPDATE, along with updated_at, see User
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"server_default": text("1"), "onupdate": text("version + 1")},
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": func.now(), "onupdate": func.now()},
+        nullable=False,
+    )
     owner: User | None = Relationship(back_populates="items")
 
 
@@ -85,11 +157,41 @@ class Item(ItemBase, table=True):
 class ItemPublic(ItemBase):
     id: uuid.UUID
     owner_id: uuid.UUID
+    created_at: datetime
 
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+
+
+# Properties to receive for each item of a bulk update
+class ItemBulkUpdate(ItemUpdate):
+    id: uuid.UUID
+
+
+# Row of a bulk request that was not applied, by its position in the request
+class ItemBulkError(SQLModel):
+    index: int
+    detail: str
+
+
+class ItemsBulkPublic(SQLModel):
+    data: list[ItemPublic]
+    errors: list[ItemBulkError]
+
+
+class ItemsBulkDeleted(SQLModel):
+    ids: list[uuid.UUID]
+    errors: list[ItemBulkError]
+
+
+# Outcome of an import, only the first rejected rows are listed in errors
+class ItemsImported(SQLModel):
+    imported: int
+    rejected: int
+    errors: list[ItemBulkError]
 
 
 # Generic message
@@ -97,15 +199,53 @@ class Message(SQLModel):
     message: str
 
 
+# Connection pool usage of the worker process that served the request
+class DatabasePoolStats(SQLModel):
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+# Counters of the email outbox of a worker process
+class EmailOutboxStats(SQLModel):
+    queued: int
+    retrying: int
+    sent: int
+    failed: int
+    retried: int
+    connections_opened: int
+
+
 # JSON payload containing access token
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+
 
+class TokenRefresh(SQLModel):
+    refresh_token: str
 
-# Contents of JWT token
+
+# Contents of JWT token, the user state claims are missing from tokens issued
+# before they were added
 class TokenPayload(SQLModel):
     sub: str | None = None
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+
+
+# Authenticated user as described by the claims of its access token
+class TokenUser(SQLModel):
+    id: uuid.UUID
+    is_active: bool
+    is_superuser: bool
 
 
 class NewPassword(SQLModel):
@@ -0,0 +1,94 @@
+"""
+Time case-insensitive email lookups, `lower(email) = lower(:email)` as done by
+`crud.get_user_by_email`, on a table of generated emails, with and without the
+functional index on `lower(email)`.
+
+It needs the database from the settings. The emails are loaded into a scratch
+unlogged table, dropped at the end, the user table is not touched.
+
+    python -m benchmarks.email_lookup --users 10000000
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import Connection, text
+
+from app.core.db import engine
+
+TABLE = "benchmark_email_lookup"
+
+
+def time_lookups(connection: Connection, users: int, lookups: int) -> list[float]:
+    statement = text(f"SELECT id FROM {TABLE} WHERE lower(email) = lower(:email)")
+    timings = []
+    for _ in range(lookups):
+        email = f"User{random.randint(1, users)}@Example.com"
+        start = time.perf_counter()
+        connection.execute(statement, {"email": email}).one()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else timings[0]
+    sys.stdout.write(
+        f"{name:<20}{len(timings):>8}{statistics.mean(timings):>12.3f}"
+        f"{statistics.median(timings):>12.3f}{p99:>12.3f}\n"
+    )
+
+
+def run(users: int, lookups: int, scan_lookups: int) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(
+            text(f"CREATE UNLOGGED TABLE {TABLE} (id bigint, email varchar(255))")
+        )
+        try:
+            sys.stdout.write(f"Loading {users} emails...\n")
+            conn.execute(
+                text(
+                    f"INSERT INTO {TABLE} SELECT g, 'user' || g || '@example.com' "
+                    "FROM generate_series(1, :users) AS g"
+                ),
+                {"users": users},
+            )
+            conn.execute(text(f"ANALYZE {TABLE}"))
+            sys.stdout.write(
+                f"{'':<20}{'lookups':>8}{'mean ms':>12}{'p50 ms':>12}{'p99 ms':>12}\n"
+            )
+            if scan_lookups:
+                report("sequential scan", time_lookups(conn, users, scan_lookups))
+            conn.execute(text(f"CREATE UNIQUE INDEX ON {TABLE} (lower(email))"))
+            conn.execute(text(f"ANALYZE {TABLE}"))
+            report("lower(email) index", time_lookups(conn, users, lookups))
+            plan = conn.execute(
+                text(
+                    f"EXPLAIN SELECT id FROM {TABLE} "
+                    "WHERE lower(email) = lower('User1@Example.com')"
+                )
+            ).scalars()
+            sys.stdout.write("\n".join(plan) + "\n")
+        finally:
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument(
+        "--scan-lookups",
+        type=int,
+        default=5,
+        help="lookups timed before creating the index, each one scans the table",
+    )
+    args = parser.parse_args()
+    run(args.users, args.lookups, args.scan_lookups)
+
+
+if __name__ == "__main__":
+    main()
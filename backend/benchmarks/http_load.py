@@ -0,0 +1,291 @@
+"""
+Load test the hot API paths: logging in, reading the current user, reading
+pages of items at increasing depths and creating items. Each scenario reports
+its p50, p95 and p99 latency, its throughput and the SQL statements issued
+per request.
+
+It needs the database from the settings. A user and its items are created for
+the run and deleted at the end. By default the app runs in-process, with the
+rate limits disabled. With `--base-url` the requests go to a running server
+instead, which has to run with `RATE_LIMIT_ENABLED=false` for the login
+scenario, and the statements can't be counted.
+
+Results are compared to a JSON baseline, the run fails when a latency grows
+by more than the tolerance or a scenario issues more statements. Save one from
+a run on the reference machine with `--update-baseline`:
+
+    python -m benchmarks.http_load --baseline benchmarks/http_load.json \\
+        --update-baseline
+    python -m benchmarks.http_load --baseline benchmarks/http_load.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlalchemy import Engine, event, insert
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.main import app
+from app.models import Item, User, UserCreate
+
+Request = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+# Compared to the baseline, p99 is reported but too noisy to fail a run
+COMPARED_LATENCIES = ["p50_ms", "p95_ms"]
+
+
+class StatementCounter:
+    def __init__(self, engine: Engine) -> None:
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *_args: Any) -> None:
+        self.count += 1
+
+
+def create_user(items: int) -> tuple[User, str]:
+    password = uuid.uuid4().hex
+    user_in = UserCreate(
+        email=f"benchmark-{uuid.uuid4()}@example.com", password=password
+    )
+    with Session(engine) as session:
+        user = crud.create_user(session=session, user_create=user_in)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "title": f"Benchmark item {i}",
+            "description": "Created by benchmarks.http_load",
+            "owner_id": user.id,
+        }
+        for i in range(items)
+    ]
+    with engine.begin() as connection:
+        for start in range(0, len(rows), 5000):
+            connection.execute(insert(Item), rows[start : start + 5000])
+    return user, password
+
+
+def delete_user(user: User) -> None:
+    # The items are deleted in cascade
+    with Session(engine) as session:
+        db_user = session.get(User, user.id)
+        if db_user:
+            session.delete(db_user)
+            session.commit()
+
+
+def read_items_page(skip: int) -> Request:
+    return lambda client: client.get(
+        f"{settings.API_V1_STR}/items/", params={"skip": skip, "limit": 100}
+    )
+
+
+def create_scenarios(
+    email: str, password: str, items: int, page_depths: list[int]
+) -> dict[str, Request]:
+    api = settings.API_V1_STR
+    scenarios: dict[str, Request] = {
+        "login": lambda client: client.post(
+            f"{api}/login/access-token",
+            data={"username": email, "password": password},
+        ),
+        "read_user_me": lambda client: client.get(f"{api}/users/me"),
+    }
+    for skip in page_depths:
+        if skip < items:
+            scenarios[f"read_items_skip_{skip}"] = read_items_page(skip)
+    scenarios["create_item"] = lambda client: client.post(
+        f"{api}/items/", json={"title": "Benchmark item"}
+    )
+    return scenarios
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    request: Request,
+    counter: StatementCounter | None,
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict[str, Any]:
+    for _ in range(warmup):
+        (await request(client)).raise_for_status()
+    timings: list[float] = []
+    # Shared by the workers, each request is taken once
+    pending = iter(range(requests))
+
+    async def work() -> None:
+        for _ in pending:
+            start = time.perf_counter()
+            response = await request(client)
+            timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    statements = counter.count if counter else 0
+    start = time.perf_counter()
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(timings, n=100)
+    return {
+        "requests": requests,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentiles[94], 3),
+        "p99_ms": round(percentiles[98], 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "queries_per_request": (
+            round((counter.count - statements) / requests, 2) if counter else None
+        ),
+    }
+
+
+async def run(
+    *,
+    base_url: str | None,
+    items: int,
+    page_depths: list[int],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict[str, dict[str, Any]]:
+    user, password = create_user(items)
+    try:
+        async with AsyncExitStack() as stack:
+            counter = None
+            if base_url:
+                client = httpx.AsyncClient(base_url=base_url)
+            else:
+                settings.RATE_LIMIT_ENABLED = False
+                client = httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://benchmark"
+                )
+                counter = StatementCounter(async_engine.sync_engine)
+                await stack.enter_async_context(app.router.lifespan_context(app))
+            await stack.enter_async_context(client)
+            r = await client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data={"username": user.email, "password": password},
+            )
+            r.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+            results = {}
+            scenarios = create_scenarios(user.email, password, items, page_depths)
+            for name, request in scenarios.items():
+                results[name] = await run_scenario(
+                    client,
+                    request,
+                    counter,
+                    requests=requests,
+                    concurrency=concurrency,
+                    warmup=warmup,
+                )
+                report(name, results[name])
+            return results
+    finally:
+        delete_user(user)
+
+
+def report(name: str, result: dict[str, Any]) -> None:
+    queries = result["queries_per_request"]
+    sys.stdout.write(
+        f"{name:<24}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+        f"{result['p99_ms']:>10.1f}{result['throughput_rps']:>10.1f}"
+        f"{'-' if queries is None else f'{queries:.2f}':>10}\n"
+    )
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for metric in COMPARED_LATENCIES:
+            if result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {result[metric]:.1f} > {expected[metric]:.1f}"
+                )
+        queries, expected_queries = (
+            result["queries_per_request"],
+            expected.get("queries_per_request"),
+        )
+        if queries is not None and expected_queries is not None:
+            if queries > expected_queries:
+                regressions.append(
+                    f"{name}: queries_per_request {queries} > {expected_queries}"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--base-url", help="URL of a running server, e.g. http://localhost:8000"
+    )
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--page-depths", type=int, nargs="+", default=[0, 1000, 10_000])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--baseline", type=Path, help="JSON baseline to compare to")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results to the baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative latency increase allowed over the baseline",
+    )
+    args = parser.parse_args()
+
+    sys.stdout.write(
+        f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'req/s':>10}{'queries':>10}\n"
+    )
+    results = asyncio.run(
+        run(
+            base_url=args.base_url,
+            items=args.items,
+            page_depths=args.page_depths,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+        )
+    )
+    if not args.baseline:
+        return
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        sys.stdout.write(f"Baseline written to {args.baseline}\n")
+        return
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.tolerance
+    )
+    for regression in regressions:
+        sys.stdout.write(f"Regression: {regression}\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Time password verifications, the CPU a login spends on its hash, for each hash
+scheme and cost, to pick the costs a login can afford. The throughput column
+is what one password hash worker process sustains, the memory column what each
+concurrent Argon2 verification allocates.
+
+No database is needed, the hashes are made in memory.
+
+    python -m benchmarks.password_hash --argon2-memory-costs 19456 47104 \\
+        --argon2-time-costs 1 2 3 --bcrypt-rounds 10 12
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from passlib.context import CryptContext
+
+from app.core.security import create_password_context
+
+PASSWORD = "correct horse battery staple"
+
+
+def create_context(
+    scheme: str, memory_cost: int, time_cost: int, rounds: int
+) -> CryptContext:
+    return create_password_context(
+        schemes=[scheme],
+        argon2_memory_cost=memory_cost,
+        argon2_time_cost=time_cost,
+        argon2_parallelism=1,
+        bcrypt_rounds=rounds,
+    )
+
+
+def time_verifications(context: CryptContext, verifications: int) -> list[float]:
+    hashed_password = context.hash(PASSWORD)
+    timings = []
+    for _ in range(verifications):
+        start = time.perf_counter()
+        assert context.verify(PASSWORD, hashed_password)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, memory: str, timings: list[float]) -> None:
+    p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else timings[0]
+    mean = statistics.mean(timings)
+    sys.stdout.write(
+        f"{name:<28}{memory:>10}{statistics.median(timings):>12.1f}"
+        f"{p99:>12.1f}{1000 / mean:>14.1f}\n"
+    )
+
+
+def run(
+    argon2_memory_costs: list[int],
+    argon2_time_costs: list[int],
+    bcrypt_rounds: list[int],
+    verifications: int,
+) -> None:
+    sys.stdout.write(
+        f"{'scheme':<28}{'memory':>10}{'p50 ms':>12}{'p99 ms':>12}"
+        f"{'logins/s/core':>14}\n"
+    )
+    for memory_cost in argon2_memory_costs:
+        for time_cost in argon2_time_costs:
+            context = create_context("argon2", memory_cost, time_cost, 12)
+            timings = time_verifications(context, verifications)
+            name = f"argon2id m={memory_cost} t={time_cost}"
+            report(name, f"{memory_cost // 1024} MiB", timings)
+    for rounds in bcrypt_rounds:
+        context = create_context("bcrypt", 19_456, 2, rounds)
+        report(
+            f"bcrypt rounds={rounds}",
+            "4 KiB",
+            time_verifications(context, verifications),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--argon2-memory-costs", type=int, nargs="+", default=[19_456, 47_104]
+    )
+    parser.add_argument("--argon2-time-costs", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--verifications", type=int, default=20)
+    args = parser.parse_args()
+    run(
+        args.argon2_memory_costs,
+        args.argon2_time_costs,
+        args.bcrypt_rounds,
+        args.verifications,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the cost per row of the two ways of serializing a page of items:
+validating the rows through the `response_model` and encoding them with the
+standard library, as the list endpoints used to, or encoding the query rows
+directly with orjson, as they do now.
+
+No database is needed, the rows are built in memory.
+
+    python -m benchmarks.serialization --limits 100 1000
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Any
+
+import orjson
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from fastapi.testclient import TestClient
+
+from app.models import Item, ItemsPublic
+
+ItemRow = namedtuple(
+    "ItemRow", ["id", "title", "description", "owner_id", "created_at"]
+)
+
+
+def create_app(limit: int) -> FastAPI:
+    owner_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    rows = [
+        ItemRow(uuid.uuid4(), f"Item {i}", f"Description {i}", owner_id, now)
+        for i in range(limit)
+    ]
+    items = [Item(**row._asdict()) for row in rows]
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=ItemsPublic, response_class=JSONResponse)
+    def response_model() -> Any:
+        return ItemsPublic(data=items, count=limit, next_cursor=None)  # type: ignore
+
+    @app.get("/direct", response_model=ItemsPublic)
+    def direct() -> Any:
+        content = orjson.dumps(
+            {
+                "data": [row._asdict() for row in rows],
+                "count": limit,
+                "next_cursor": None,
+            },
+            option=orjson.OPT_UTC_Z,
+        )
+        return Response(content, media_type="application/json")
+
+    return app
+
+
+def run(limits: list[int], requests: int) -> None:
+    sys.stdout.write(f"{'path':<16}{'limit':>8}{'us/request':>14}{'us/row':>10}\n")
+    for limit in limits:
+        client = TestClient(create_app(limit))
+        for path in ("/response-model", "/direct"):
+            client.get(path).raise_for_status()
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            per_request = (time.perf_counter() - start) / requests * 1e6
+            sys.stdout.write(
+                f"{path:<16}{limit:>8}{per_request:>14.1f}{per_request / limit:>10.2f}\n"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    run(args.limits, args.requests)
+
+
+if __name__ == "__main__":
+    main()
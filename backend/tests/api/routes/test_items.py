@@ -1,10 +1,20 @@
+import csv
+import io
+import json
 import uuid
+from typing import Any
+from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app import crud
 from app.core.config import settings
+from app.models import UserCreate
 from tests.utils.item import create_random_item
+from tests.utils.user import user_authentication_headers
+from tests.utils.utils import QueryBudget, random_email, random_lower_string
 
 
 def test_create_item(
@@ -24,6 +34,35 @@ def test_create_item(
     assert "owner_id" in content
 
 
+@pytest.mark.parametrize(
+    "path, content",
+    [
+        ("/items/", json.dumps({"title": "Foo"})),
+        ("/items/bulk", json.dumps([{"title": "Foo"}])),
+        ("/items/import", json.dumps({"title": "Foo"})),
+    ],
+)
+def test_create_items_deleted_user(
+    client: TestClient, db: Session, path: str, content: str
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=email, password=password)
+    )
+    headers = user_authentication_headers(client=client, email=email, password=password)
+    db.delete(user)
+    db.commit()
+    # The token is still valid, the owner no longer exists
+    response = client.post(
+        f"{settings.API_V1_STR}{path}",
+        headers={**headers, "Content-Type": "application/json"},
+        content=content,
+    )
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User not found"}
+
+
 def test_read_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -40,6 +79,55 @@ def test_read_item(
     assert content["owner_id"] == str(item.owner_id)
 
 
+def test_read_item_datetimes_match_response_model(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Datetimes"},
+    )
+    created = response.json()
+    assert created["created_at"].endswith("Z")
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{created['id']}",
+        headers=normal_user_token_headers,
+    )
+    assert response.json()["created_at"] == created["created_at"]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        params={"limit": 1000},
+    )
+    [row] = [row for row in response.json()["data"] if row["id"] == created["id"]]
+    assert row["created_at"] == created["created_at"]
+
+
+def test_read_item_not_modified(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+    response = client.get(url, headers=superuser_token_headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+    client.put(url, headers=superuser_token_headers, json={"title": "Updated"})
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["title"] == "Updated"
+
+
 def test_read_item_not_found(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -79,6 +167,184 @@ def test_read_items(
     assert len(content["data"]) >= 2
 
 
+def test_read_items_query_budget(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    query_budget: QueryBudget,
+) -> None:
+    create_random_item(db)
+    # The count and the page
+    with query_budget(2):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+        )
+    assert response.status_code == 200
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
+
+
+def test_read_items_cached_for_superusers(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    query_budget: QueryBudget,
+) -> None:
+    url = f"{settings.API_V1_STR}/items/?limit=5&count=none"
+    with patch("app.core.config.settings.LIST_CACHE_TTL_SECONDS", 60):
+        response = client.get(url, headers=superuser_token_headers)
+        etag = response.headers["ETag"]
+        with query_budget(0):
+            cached = client.get(url, headers=superuser_token_headers)
+            not_modified = client.get(
+                url, headers={**superuser_token_headers, "If-None-Match": etag}
+            )
+        assert cached.json() == response.json()
+        assert cached.headers["ETag"] == etag
+        assert not_modified.status_code == 304
+
+        item_id = response.json()["data"][0]["id"]
+        client.put(
+            f"{settings.API_V1_STR}/items/{item_id}",
+            headers=superuser_token_headers,
+            json={"title": "Updated"},
+        )
+        response = client.get(url, headers=superuser_token_headers)
+        assert response.headers["ETag"] != etag
+        assert response.json()["data"][0]["title"] == "Updated"
+
+
+def test_create_item_query_budget(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    query_budget: QueryBudget,
+) -> None:
+    # The insert and the refresh
+    with query_budget(2):
+        response = client.post(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            json={"title": "Foo"},
+        )
+    assert response.status_code == 200
+
+
+def test_read_items_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"limit": 2},
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["data"]) == 2
+    assert first_page["next_cursor"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    first_ids = {item["id"] for item in first_page["data"]}
+    assert second_page["data"]
+    assert all(item["id"] not in first_ids for item in second_page["data"])
+
+
+def test_read_items_ordered_by_creation(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    for title in ("First", "Second", "Third"):
+        response = client.post(
+            f"{settings.API_V1_STR}/items/",
+            headers=normal_user_token_headers,
+            json={"title": title},
+        )
+        assert response.status_code == 200
+    pages: list[dict[str, Any]] = []
+    params: dict[str, Any] = {"limit": 1}
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=normal_user_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        content = response.json()
+        pages.extend(content["data"])
+        if not content["next_cursor"]:
+            break
+        params["cursor"] = content["next_cursor"]
+    created = [item["created_at"] for item in pages]
+    assert created == sorted(created)
+    assert [item["title"] for item in pages][-3:] == ["First", "Second", "Third"]
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    content = response.json()
+    assert content["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("limit", [-1, 0, 1001])
+def test_read_items_invalid_limit(
+    client: TestClient, superuser_token_headers: dict[str, str], limit: int
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"limit": limit},
+    )
+    assert response.status_code == 422
+
+
+def test_read_items_count_strategies(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    for strategy in ("exact", "cached", "estimate"):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=normal_user_token_headers,
+            params={"count": strategy},
+        )
+        assert response.status_code == 200
+        content = response.json()
+        assert content["count"] >= len(content["data"])
+
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Counted"},
+    )
+    assert response.status_code == 200
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        params={"count": "cached"},
+    )
+    content = response.json()
+    assert content["count"] == len(content["data"])
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        params={"count": "none"},
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] is None
+
+
 def test_update_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -162,3 +428,249 @@ def test_delete_item_not_enough_permissions(
     assert response.status_code == 400
     content = response.json()
     assert content["detail"] == "Not enough permissions"
+
+
+def test_create_items_bulk(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    data = [
+        {"title": "Foo", "description": "Fighters"},
+        {"title": ""},
+        {"title": "Bar"},
+    ]
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert sorted(item["title"] for item in content["data"]) == ["Bar", "Foo"]
+    assert len(content["errors"]) == 1
+    assert content["errors"][0]["index"] == 1
+
+
+def test_create_items_bulk_too_many(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    data = [{"title": "Foo"}] * (settings.ITEMS_BULK_MAX_SIZE + 1)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 422
+
+
+def test_update_items_bulk(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    item = create_random_item(db)
+    other_item = create_random_item(db)
+    data = [
+        {"id": str(item.id), "title": "Updated title"},
+        {"id": str(other_item.id), "description": None},
+        {"id": str(uuid.uuid4()), "title": "Missing"},
+        {"id": str(item.id), "title": None},
+    ]
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    updated = {item["id"]: item for item in content["data"]}
+    assert updated[str(item.id)]["title"] == "Updated title"
+    assert updated[str(item.id)]["description"] == item.description
+    assert updated[str(other_item.id)]["title"] == other_item.title
+    assert updated[str(other_item.id)]["description"] is None
+    assert [error["index"] for error in content["errors"]] == [2, 3]
+    assert content["errors"][0]["detail"] == "Item not found"
+
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"id": str(item.id), "title": "Not mine"}],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["data"] == []
+    assert content["errors"][0]["detail"] == "Not enough permissions"
+
+
+def test_delete_items_bulk(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    item = create_random_item(db)
+    other_item = create_random_item(db)
+    response = client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[str(item.id)],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["ids"] == []
+    assert content["errors"][0]["detail"] == "Not enough permissions"
+
+    missing_id = str(uuid.uuid4())
+    response = client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json=[str(item.id), str(other_item.id), missing_id],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert sorted(content["ids"]) == sorted([str(item.id), str(other_item.id)])
+    assert content["errors"] == [{"index": 2, "detail": "Item not found"}]
+
+
+def test_export_items_ndjson(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = {row["id"]: row for row in map(json.loads, response.text.splitlines())}
+    row = rows[str(item.id)]
+    assert row["title"] == item.title
+    assert row["description"] == item.description
+    assert row["owner_id"] == str(item.owner_id)
+    assert row["created_at"]
+
+
+def test_export_items_csv(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    other_item = create_random_item(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Foo, with comma", "description": "Fighters"},
+    )
+    item = response.json()
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "items.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    ids = [row["id"] for row in rows]
+    assert item["id"] in ids
+    assert str(other_item.id) not in ids
+    assert all(row["owner_id"] == item["owner_id"] for row in rows)
+    row = next(row for row in rows if row["id"] == item["id"])
+    assert row.keys() == item.keys()
+    assert row["title"] == item["title"]
+    assert row["description"] == item["description"]
+
+
+def test_import_items_ndjson(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    title = random_lower_string()
+    content = "\n".join(
+        [
+            json.dumps({"title": title, "description": "Fighters"}),
+            json.dumps({"title": ""}),
+            "not json",
+            json.dumps({"title": title}),
+        ]
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        headers=normal_user_token_headers,
+        content=content,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["rejected"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export", headers=normal_user_token_headers
+    )
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(
+        row["description"] or "" for row in rows if row["title"] == title
+    ) == [
+        "",
+        "Fighters",
+    ]
+
+
+def test_import_items_nul_character(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    title = random_lower_string()
+    content = "\n".join(
+        [
+            json.dumps({"title": title}),
+            json.dumps({"title": "\u0000x"}),
+            json.dumps({"title": title, "description": "x\u0000"}),
+        ]
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        headers=normal_user_token_headers,
+        content=content,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 1
+    assert result["rejected"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+
+
+def test_import_items_csv(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    title = random_lower_string()
+    content = (
+        "title,description\r\n"
+        f'{title},"Multi\nline, quoted"\r\n'
+        ",Missing title\r\n"
+        f"{title},Too,many\r\n"
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+        content=content,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 1
+    assert result["rejected"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+
+
+def test_import_items_csv_byte_order_mark(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    title = random_lower_string()
+    content = f"title,description\r\n{title},Fighters\r\n".encode("utf-8-sig")
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+        content=content,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"imported": 1, "rejected": 0, "errors": []}
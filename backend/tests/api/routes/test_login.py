@@ -4,6 +4,7 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.outbox import email_outbox
 from app.core.security import verify_password
 from app.crud import create_user
 from app.models import UserCreate
@@ -51,6 +52,7 @@ def test_recovery_password(
     with (
         patch("app.core.config.settings.SMTP_HOST", "smtp.example.com"),
         patch("app.core.config.settings.SMTP_USER", "admin@example.com"),
+        patch.object(email_outbox, "enqueue") as enqueue,
     ):
         email = "test@example.com"
         r = client.post(
@@ -59,6 +61,8 @@ def test_recovery_password(
         )
         assert r.status_code == 200
         assert r.json() == {"message": "Password recovery email sent"}
+        enqueue.assert_called_once()
+        assert enqueue.call_args.kwargs["email_to"] == email
 
 
 def test_recovery_password_user_not_exits(
@@ -116,3 +120,126 @@ def test_reset_password_invalid_token(
     assert "detail" in response
     assert r.status_code == 400
     assert response["detail"] == "Invalid token"
+
+
+def test_get_access_token_rate_limited_per_account(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    with (
+        patch("app.core.config.settings.RATE_LIMIT_ENABLED", True),
+        patch("app.core.config.settings.LOGIN_RATE_LIMIT_PER_ACCOUNT", 2),
+    ):
+        responses = [
+            client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+            for _ in range(3)
+        ]
+    assert [r.status_code for r in responses] == [400, 400, 429]
+    assert int(responses[2].headers["Retry-After"]) >= 1
+
+
+def test_get_access_token_rate_limit_per_account_counts_failures(
+    client: TestClient,
+) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    with (
+        patch("app.core.config.settings.RATE_LIMIT_ENABLED", True),
+        patch("app.core.config.settings.LOGIN_RATE_LIMIT_PER_ACCOUNT", 2),
+    ):
+        responses = [
+            client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+            for _ in range(3)
+        ]
+    assert [r.status_code for r in responses] == [200, 200, 200]
+
+
+def login(client: TestClient, email: str, password: str) -> dict[str, str]:
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_refresh_access_token(client: TestClient) -> None:
+    tokens = login(client, settings.FIRST_SUPERUSER, settings.FIRST_SUPERUSER_PASSWORD)
+    assert tokens["refresh_token"]
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 200
+    new_tokens = r.json()
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+    r = client.post(
+        f"{settings.API_V1_STR}/login/test-token",
+        headers={"Authorization": f"Bearer {new_tokens['access_token']}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["email"] == settings.FIRST_SUPERUSER
+
+
+def test_refresh_access_token_invalid(client: TestClient) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": random_lower_string()},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid refresh token"
+
+
+def test_refresh_access_token_reused_revokes_family(
+    client: TestClient, db: Session
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    create_user(session=db, user_create=UserCreate(email=email, password=password))
+    tokens = login(client, email, password)
+    other_tokens = login(client, email, password)
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 200
+    new_refresh_token = r.json()["refresh_token"]
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 400
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": new_refresh_token},
+    )
+    assert r.status_code == 400
+    # Other logins of the user are left alone
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": other_tokens["refresh_token"]},
+    )
+    assert r.status_code == 200
+
+
+def test_refresh_access_token_revoked_on_deactivation(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = create_user(
+        session=db, user_create=UserCreate(email=email, password=password)
+    )
+    tokens = login(client, email, password)
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_active": False},
+    )
+    assert r.status_code == 200
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 400
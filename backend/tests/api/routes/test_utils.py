@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_read_db_pool(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["pool_class"]
+    assert stats["checkouts"] >= 1
+    assert stats["timeouts"] == 0
+
+
+def test_read_db_pool_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
+
+
+def test_read_email_outbox(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/email-outbox/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["queued"] == 0
+    assert stats["failed"] == 0
@@ -0,0 +1,21 @@
+import jwt
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_read_jwks_verifies_access_token(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    access_token = r.json()["access_token"]
+
+    r = client.get("/.well-known/jwks.json")
+    assert r.status_code == 200
+    assert "max-age" in r.headers["Cache-Control"]
+    jwks = jwt.PyJWKSet.from_dict(r.json())
+    jwk = jwks[jwt.get_unverified_header(access_token)["kid"]]
+    payload = jwt.decode(access_token, jwk.key, algorithms=[jwk.algorithm_name])
+    assert payload["is_superuser"] is True
@@ -0,0 +1,55 @@
+import time
+import uuid
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import jwt
+import pytest
+from jwt.exceptions import ExpiredSignatureError
+
+from app.api.deps import decode_token, get_current_user
+from app.core.security import create_access_token
+
+
+def test_decode_token_is_cached() -> None:
+    token = create_access_token("some-user-id", expires_delta=timedelta(minutes=5))
+    with patch("app.core.security.jwt.decode", wraps=jwt.decode) as decode_mock:
+        assert decode_token(token).sub == "some-user-id"
+        assert decode_token(token).sub == "some-user-id"
+    assert decode_mock.call_count == 1
+
+
+def test_decode_token_expired_is_not_cached() -> None:
+    token = create_access_token("some-user-id", expires_delta=timedelta(minutes=-1))
+    with pytest.raises(ExpiredSignatureError):
+        decode_token(token)
+    with pytest.raises(ExpiredSignatureError):
+        decode_token(token)
+
+
+def test_decode_token_cache_respects_expiration() -> None:
+    token = create_access_token("some-user-id", expires_delta=timedelta(seconds=30))
+    decode_token(token)
+    with (
+        patch("app.core.cache.time.monotonic", return_value=time.monotonic() + 60),
+        patch("app.core.security.jwt.decode", wraps=jwt.decode) as decode_mock,
+    ):
+        decode_token(token)
+    assert decode_mock.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_get_current_user_from_claims() -> None:
+    user_id = uuid.uuid4()
+    token = create_access_token(
+        user_id,
+        expires_delta=timedelta(minutes=5),
+        claims={"is_active": True, "is_superuser": True},
+    )
+    session = MagicMock()
+    with patch("app.api.deps.crud.get_cached_user_async") as get_cached_user:
+        user = await get_current_user(session=session, token=token)
+    assert user.id == user_id
+    assert user.is_superuser is True
+    get_cached_user.assert_not_called()
+    assert not session.mock_calls
@@ -1,15 +1,19 @@
 from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlmodel import Session, delete
 
 from app.core.config import settings
-from app.core.db import engine, init_db
+from app.core.db import QueryStats, async_engine, engine, init_db
 from app.main import app
 from app.models import Item, User
 from tests.utils.user import authentication_token_from_email
-from tests.utils.utils import get_superuser_token_headers
+from tests.utils.utils import QueryBudget, get_superuser_token_headers
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -24,6 +28,20 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    # The app only runs on asyncio, trio isn't installed
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disable_rate_limits() -> Generator[None, None, None]:
+    # The tests log in far more often than the limits allow, the tests of the
+    # limits enable them again
+    with patch("app.core.config.settings.RATE_LIMIT_ENABLED", False):
+        yield
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -40,3 +58,34 @@ def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
+
+
+@pytest.fixture
+def query_budget() -> QueryBudget:
+    """
+    Check that the requests made in the block run at most `max_queries`
+    statements, e.g. `with query_budget(2): client.get(...)`.
+    """
+
+    @contextmanager
+    def check(max_queries: int) -> Generator[QueryStats, None, None]:
+        stats = QueryStats()
+
+        def count(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+            stats.count += 1
+            stats.statements[statement] += 1
+
+        engines = [engine, async_engine.sync_engine]
+        for db_engine in engines:
+            event.listen(db_engine, "after_cursor_execute", count)
+        try:
+            yield stats
+        finally:
+            for db_engine in engines:
+                event.remove(db_engine, "after_cursor_execute", count)
+        assert stats.count <= max_queries, (
+            f"{stats.count} queries over a budget of {max_queries}:\n"
+            + "\n".join(stats.statements.elements())
+        )
+
+    return check
@@ -0,0 +1,109 @@
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend, TTLCache
+
+
+class FakeRedis:
+    """
+    Stand-in for the subset of `redis.asyncio.Redis` used by RedisCacheBackend.
+    """
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+        self.expirations: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, px: int) -> Any:
+        self.data[key] = value.encode()
+        self.expirations[key] = px
+        return True
+
+    async def delete(self, key: str) -> int:
+        self.expirations.pop(key, None)
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    async def incr(self, key: str) -> int:
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def pexpire(self, key: str, px: int) -> bool:
+        self.expirations[key] = px
+        return True
+
+
+def test_cache_get_set() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_cache_entries_expire() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    with patch("app.core.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=600)
+    with patch("app.core.cache.time.monotonic", return_value=1100.0):
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+
+@pytest.mark.anyio
+async def test_memory_cache_backend() -> None:
+    backend = MemoryCacheBackend(maxsize=10)
+    await backend.set("a", "1", ttl=60)
+    assert await backend.get("a") == "1"
+    await backend.delete("a")
+    assert await backend.get("a") is None
+
+
+@pytest.mark.anyio
+async def test_redis_cache_backend() -> None:
+    client = FakeRedis()
+    backend = RedisCacheBackend(client, prefix="user:")
+    await backend.set("a", "1", ttl=1.5)
+    assert client.data == {"user:a": b"1"}
+    assert client.expirations == {"user:a": 1500}
+    assert await backend.get("a") == "1"
+    await backend.delete("a")
+    assert await backend.get("a") is None
+
+
+@pytest.mark.anyio
+async def test_memory_cache_backend_incr() -> None:
+    backend = MemoryCacheBackend(maxsize=10)
+    assert await backend.incr("a", ttl=60) == 1
+    assert await backend.incr("a", ttl=60) == 2
+    assert await backend.get("a") == "2"
+
+
+@pytest.mark.anyio
+async def test_redis_cache_backend_incr() -> None:
+    client = FakeRedis()
+    backend = RedisCacheBackend(client, prefix="ratelimit:")
+    assert await backend.incr("a", ttl=2) == 1
+    assert client.expirations == {"ratelimit:a": 2000}
+    client.expirations.clear()
+    assert await backend.incr("a", ttl=2) == 2
+    # The expiration is only set by the first increment
+    assert client.expirations == {}
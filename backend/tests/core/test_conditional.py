@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+from starlette.datastructures import Headers
+
+from app.core.conditional import is_not_modified, make_etag
+
+LAST_MODIFIED = datetime(2026, 10, 18, 12, 30, 15, 250_000, tzinfo=timezone.utc)
+
+
+def test_make_etag() -> None:
+    etag = make_etag("id", 1)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag("id", 1) == etag
+    assert make_etag("id", 2) != etag
+
+
+def test_is_not_modified_if_none_match() -> None:
+    etag = make_etag("id", 1)
+    assert is_not_modified(Headers({"if-none-match": etag}), etag=etag)
+    assert is_not_modified(Headers({"if-none-match": f'"other", W/{etag}'}), etag=etag)
+    assert is_not_modified(Headers({"if-none-match": "*"}), etag=etag)
+    assert not is_not_modified(Headers({"if-none-match": '"other"'}), etag=etag)
+    # If-None-Match takes precedence over If-Modified-Since
+    headers = Headers(
+        {
+            "if-none-match": '"other"',
+            "if-modified-since": "Sun, 18 Oct 2026 12:30:15 GMT",
+        }
+    )
+    assert not is_not_modified(headers, etag=etag, last_modified=LAST_MODIFIED)
+
+
+def test_is_not_modified_if_modified_since() -> None:
+    etag = make_etag("id", 1)
+
+    def check(since: str) -> bool:
+        headers = Headers({"if-modified-since": since})
+        return is_not_modified(headers, etag=etag, last_modified=LAST_MODIFIED)
+
+    assert check("Sun, 18 Oct 2026 12:30:15 GMT")
+    assert check("Sun, 18 Oct 2026 13:00:00 GMT")
+    assert not check("Sun, 18 Oct 2026 12:30:14 GMT")
+    assert not check("invalid")
+    assert not is_not_modified(
+        Headers({"if-modified-since": "Sun, 18 Oct 2026 12:30:15 GMT"}), etag=etag
+    )
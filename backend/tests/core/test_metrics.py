@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.middleware import MetricsMiddleware
+from app.main import custom_generate_unique_id
+
+
+def test_metrics_middleware_labels_route_id() -> None:
+    router = APIRouter(prefix="/things", tags=["things"])
+
+    @router.get("/{id}")
+    def read_thing(id: int) -> int:
+        return id
+
+    app = FastAPI(generate_unique_id_function=custom_generate_unique_id)
+    app.include_router(router)
+    app.add_middleware(MetricsMiddleware, route_id=custom_generate_unique_id)
+    labels = {"route": "things-read_thing", "method": "GET", "status": "200"}
+    before = REGISTRY.get_sample_value("http_request_duration_seconds_count", labels)
+
+    with TestClient(app) as client:
+        client.get("/things/1")
+        client.get("/things/2")
+        client.get("/missing")
+
+    after = REGISTRY.get_sample_value("http_request_duration_seconds_count", labels)
+    assert after == (before or 0) + 2
+    assert REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"route": "unmatched", "method": "GET", "status": "404"},
+    )
+    assert REGISTRY.get_sample_value("http_requests_in_progress") == 0
+
+
+def test_metrics_aggregate_worker_processes(tmp_path: Path) -> None:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    observe = (
+        "from app.core.metrics import request_duration; "
+        "request_duration.labels('utils-health_check', 'GET', '200').observe(0.1)"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", observe], env=env, check=True)
+    render = (
+        "import sys; from app.core.metrics import render_metrics; "
+        "sys.stdout.write(render_metrics()[0].decode())"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", render],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="utils-health_check",status="200"} 2.0'
+    ) in output
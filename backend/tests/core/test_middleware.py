@@ -0,0 +1,60 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.db import track_engine_queries
+from app.core.middleware import QueryStatsMiddleware
+
+
+def create_app(queries: int) -> FastAPI:
+    engine = create_engine("sqlite://")
+    track_engine_queries(engine)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/")
+    def read_root() -> dict[str, int]:
+        with engine.connect() as connection:
+            for _ in range(queries):
+                connection.execute(text("SELECT 1"))
+        return {"ok": 1}
+
+    return app
+
+
+def test_query_stats_server_timing() -> None:
+    with TestClient(create_app(queries=3)) as client:
+        r = client.get("/")
+    assert r.status_code == 200
+    db_timing, app_timing = r.headers["Server-Timing"].split(", ")
+    assert db_timing.startswith("db;dur=")
+    assert db_timing.endswith(';desc="3 queries"')
+    assert app_timing.startswith("app;dur=")
+
+
+def test_query_stats_warns_on_repeated_statement(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    with (
+        caplog.at_level(logging.DEBUG, logger="app.core.middleware"),
+        TestClient(create_app(queries=5)) as client,
+    ):
+        client.get("/")
+    [record] = [r for r in caplog.records if r.name == "app.core.middleware"]
+    assert record.levelno == logging.WARNING
+    assert "repeats=5: SELECT 1" in record.getMessage()
+    assert record.queries == 5  # type: ignore[attr-defined]
+
+
+def test_query_stats_logs_request(caplog: pytest.LogCaptureFixture) -> None:
+    with (
+        caplog.at_level(logging.DEBUG, logger="app.core.middleware"),
+        TestClient(create_app(queries=1)) as client,
+    ):
+        client.get("/")
+    [record] = [r for r in caplog.records if r.name == "app.core.middleware"]
+    assert record.levelno == logging.DEBUG
+    assert record.getMessage().startswith("method=GET path=/ status=200 queries=1")
@@ -0,0 +1,140 @@
+import socket
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from app.core.outbox import EmailOutbox, EmailOutboxFullError, SMTPConnection
+
+controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class Handler:
+    """
+    Accepts the messages, after answering the first `fail_with` ones with the
+    given replies.
+    """
+
+    def __init__(self, fail_with: list[str] | None = None) -> None:
+        self.fail_with = fail_with or []
+        self.received: list[Any] = []
+
+    async def handle_DATA(self, _server: Any, _session: Any, envelope: Any) -> str:
+        if self.fail_with:
+            return self.fail_with.pop(0)
+        self.received.append(envelope)
+        return "250 OK"
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+@pytest.fixture
+def smtp_server() -> Generator[Any, None, None]:
+    server = controller.Controller(
+        Handler(), hostname="127.0.0.1", port=get_free_port()
+    )
+    server.start()
+    # Emails can only be enqueued when they are configured
+    with patch("app.core.config.settings.SMTP_HOST", server.hostname):
+        yield server
+    server.stop()
+
+
+def create_outbox(smtp_server: Any, **kwargs: Any) -> EmailOutbox:
+    def connection_factory() -> SMTPConnection:
+        return SMTPConnection(
+            host=smtp_server.hostname,
+            port=smtp_server.port,
+            mail_from=("Test", "from@example.com"),
+        )
+
+    options: dict[str, Any] = {
+        "workers": 1,
+        "max_size": 10,
+        "max_retries": 2,
+        "retry_delay": 0.01,
+    }
+    return EmailOutbox(connection_factory=connection_factory, **options | kwargs)
+
+
+@pytest.mark.anyio
+async def test_email_outbox_reuses_connection(smtp_server: Any) -> None:
+    outbox = create_outbox(smtp_server)
+    await outbox.start()
+    for i in range(3):
+        outbox.enqueue(
+            email_to=f"user{i}@example.com", subject="Hi", html_content="<p>Hi</p>"
+        )
+    await outbox.stop(timeout=5)
+    received = smtp_server.handler.received
+    assert [envelope.rcpt_tos for envelope in received] == [
+        [f"user{i}@example.com"] for i in range(3)
+    ]
+    assert outbox.metrics.sent == 3
+    assert outbox.metrics.connections_opened == 1
+
+
+@pytest.mark.anyio
+async def test_email_outbox_retries_temporary_failures(smtp_server: Any) -> None:
+    smtp_server.handler.fail_with = ["451 Try again later"]
+    outbox = create_outbox(smtp_server)
+    await outbox.start()
+    outbox.enqueue(email_to="user@example.com", subject="Hi", html_content="<p>Hi</p>")
+    await outbox.stop(timeout=5)
+    assert len(smtp_server.handler.received) == 1
+    assert outbox.metrics.retried == 1
+    assert outbox.metrics.sent == 1
+    assert outbox.metrics.failed == 0
+
+
+@pytest.mark.anyio
+async def test_email_outbox_does_not_retry_permanent_failures(
+    smtp_server: Any,
+) -> None:
+    smtp_server.handler.fail_with = ["550 No such user"]
+    outbox = create_outbox(smtp_server)
+    await outbox.start()
+    outbox.enqueue(email_to="user@example.com", subject="Hi", html_content="<p>Hi</p>")
+    await outbox.stop(timeout=5)
+    assert smtp_server.handler.received == []
+    assert outbox.metrics.retried == 0
+    assert outbox.metrics.failed == 1
+
+
+@pytest.mark.anyio
+async def test_email_outbox_rejects_when_full(smtp_server: Any) -> None:
+    outbox = create_outbox(smtp_server, workers=0, max_size=1)
+    await outbox.start()
+    outbox.enqueue(email_to="user@example.com", subject="Hi", html_content="<p>Hi</p>")
+    with pytest.raises(EmailOutboxFullError):
+        outbox.enqueue(
+            email_to="user@example.com", subject="Hi", html_content="<p>Hi</p>"
+        )
+    await outbox.stop(timeout=0)
+
+
+@pytest.mark.parametrize(
+    ("tls", "ssl", "smtp_class"), [(True, True, "SMTP"), (False, True, "SMTP_SSL")]
+)
+def test_smtp_connection_prefers_starttls(
+    tls: bool, ssl: bool, smtp_class: str
+) -> None:
+    connection = SMTPConnection(
+        host="smtp.example.com",
+        port=587,
+        tls=tls,
+        ssl=ssl,
+        user="user",
+        mail_from=("Test", "from@example.com"),
+    )
+    with patch(f"app.core.outbox.smtplib.{smtp_class}") as smtp:
+        connection.open()
+    assert smtp.return_value.starttls.called is tls
+    # The user logs in even without a password
+    smtp.return_value.login.assert_called_once_with("user", "")
@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import MemoryCacheBackend
+from app.core.ratelimit import RateLimiter, RateLimitExceededError
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_rejects_over_limit() -> None:
+    limiter = RateLimiter(MemoryCacheBackend(maxsize=10))
+    with patch("app.core.ratelimit.time.time", return_value=1000.0):
+        for _ in range(3):
+            await limiter.hit("key", limit=3, window=60)
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            await limiter.hit("key", limit=3, window=60)
+        await limiter.hit("other-key", limit=3, window=60)
+    assert exc_info.value.retry_after == pytest.approx(20)
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_weights_previous_window() -> None:
+    limiter = RateLimiter(MemoryCacheBackend(maxsize=10))
+    with patch("app.core.ratelimit.time.time", return_value=1150.0):
+        for _ in range(4):
+            await limiter.hit("key", limit=4, window=60)
+    # Half of the previous window still overlaps, 2 of its 4 requests count
+    with patch("app.core.ratelimit.time.time", return_value=1230.0):
+        for _ in range(2):
+            await limiter.hit("key", limit=4, window=60)
+        with pytest.raises(RateLimitExceededError):
+            await limiter.hit("key", limit=4, window=60)
+    # The previous window no longer overlaps
+    with patch("app.core.ratelimit.time.time", return_value=1330.0):
+        await limiter.hit("key", limit=4, window=60)
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_check_does_not_count() -> None:
+    limiter = RateLimiter(MemoryCacheBackend(maxsize=10))
+    with patch("app.core.ratelimit.time.time", return_value=1000.0):
+        for _ in range(3):
+            await limiter.check("key", limit=2, window=60)
+        for _ in range(2):
+            await limiter.hit("key", limit=2, window=60)
+        with pytest.raises(RateLimitExceededError):
+            await limiter.check("key", limit=2, window=60)
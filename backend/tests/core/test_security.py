@@ -0,0 +1,122 @@
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ec import (
+    SECP256R1,
+    SECP384R1,
+    generate_private_key,
+)
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from jwt.exceptions import InvalidTokenError
+
+from app.core.security import (
+    JWTKeys,
+    PasswordHasherBusyError,
+    PasswordHashPool,
+    create_access_token,
+    create_password_context,
+    create_signing_key,
+    decode_access_token,
+    get_password_hash,
+    verify_password,
+)
+
+
+@pytest.mark.anyio
+async def test_password_hash_pool_hashes_in_worker_process() -> None:
+    pool = PasswordHashPool(workers=1, max_pending=4)
+    try:
+        hashed_password = await pool.run(get_password_hash, "secret-password")
+        assert await pool.run(verify_password, "secret-password", hashed_password)
+        assert not await pool.run(verify_password, "wrong-password", hashed_password)
+    finally:
+        pool.shutdown()
+    assert pool.pending == 0
+
+
+@pytest.mark.anyio
+async def test_password_hash_pool_rejects_when_saturated() -> None:
+    pool = PasswordHashPool(workers=0, max_pending=1)
+    results = await asyncio.gather(
+        pool.run(get_password_hash, "first-password"),
+        pool.run(get_password_hash, "second-password"),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], PasswordHasherBusyError)
+    assert pool.pending == 0
+
+
+def test_signing_key_kid_is_jwk_thumbprint() -> None:
+    # RFC 8037 appendix A.3
+    private_key = Ed25519PrivateKey.from_private_bytes(
+        bytes.fromhex(
+            "9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60"
+        )
+    )
+    key = create_signing_key(private_key)
+    assert key.algorithm == "EdDSA"
+    assert key.kid == "kPrK_qmxVWaYVA9wwBF6Iuo3vVzz7TxHCTwXBygrS4k"
+    assert key.public_jwk["x"] == "11qYAYKxCrfVS_7TyWQHOg7hcvPapiMlrwIaaPcHURo"
+    assert "d" not in key.public_jwk
+
+
+def test_signing_key_rejects_other_curves() -> None:
+    with pytest.raises(ValueError):
+        create_signing_key(generate_private_key(SECP384R1()))
+
+
+def test_signing_key_rejects_public_keys() -> None:
+    with pytest.raises(ValueError):
+        create_signing_key(generate_private_key(SECP256R1()).public_key())
+
+
+def test_access_token_verified_with_jwks() -> None:
+    key = create_signing_key(generate_private_key(SECP256R1()))
+    with patch("app.core.security.jwt_keys", JWTKeys([key])):
+        token = create_access_token("some-user-id", expires_delta=timedelta(minutes=5))
+    assert jwt.get_unverified_header(token)["kid"] == key.kid
+    jwk = jwt.PyJWK(JWTKeys([key]).jwks()["keys"][0])
+    payload = jwt.decode(token, jwk.key, algorithms=[jwk.algorithm_name])
+    assert payload["sub"] == "some-user-id"
+
+
+def test_access_token_verified_after_key_rotation() -> None:
+    old_key = create_signing_key(Ed25519PrivateKey.generate())
+    new_key = create_signing_key(generate_private_key(SECP256R1()))
+    with patch("app.core.security.jwt_keys", JWTKeys([old_key])):
+        old_token = create_access_token("old-user", expires_delta=timedelta(minutes=5))
+    with patch("app.core.security.jwt_keys", JWTKeys([new_key, old_key])):
+        new_token = create_access_token("new-user", expires_delta=timedelta(minutes=5))
+        assert decode_access_token(old_token)["sub"] == "old-user"
+        assert decode_access_token(new_token)["sub"] == "new-user"
+    # Dropped keys no longer verify their tokens
+    with patch("app.core.security.jwt_keys", JWTKeys([new_key])):
+        with pytest.raises(InvalidTokenError):
+            decode_access_token(old_token)
+
+
+def test_password_context_updates_other_schemes_and_costs() -> None:
+    costs = {
+        "argon2_memory_cost": 8192,
+        "argon2_time_cost": 1,
+        "argon2_parallelism": 1,
+        "bcrypt_rounds": 4,
+    }
+    context = create_password_context(schemes=["argon2", "bcrypt"], **costs)
+    bcrypt_hash = create_password_context(schemes=["bcrypt"], **costs).hash("secret")
+    verified, new_hash = context.verify_and_update("secret", bcrypt_hash)
+    assert verified
+    assert new_hash and new_hash.startswith("$argon2id$v=19$m=8192,t=1,p=1$")
+    assert context.verify_and_update("secret", new_hash) == (True, None)
+
+    costlier_context = create_password_context(
+        schemes=["argon2", "bcrypt"], **{**costs, "argon2_time_cost": 2}
+    )
+    verified, new_hash = costlier_context.verify_and_update("secret", new_hash)
+    assert verified
+    assert new_hash and "$m=8192,t=2,p=1$" in new_hash
+    assert costlier_context.verify_and_update("wrong", new_hash) == (False, None)
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, FastAPI
+
+from app.core.tracing import TracesSampler
+from app.main import custom_generate_unique_id
+
+
+def create_sampler() -> TracesSampler:
+    router = APIRouter(prefix="/things", tags=["things"])
+
+    @router.get("/health")
+    def health() -> bool:
+        return True
+
+    @router.get("/{id}")
+    def read_thing(id: int) -> int:
+        return id
+
+    app = FastAPI(generate_unique_id_function=custom_generate_unique_id)
+    app.include_router(router, prefix="/api")
+    return TracesSampler(
+        app.openapi,
+        default_rate=0.25,
+        route_rates={"things-health": 0.0, "things-read_thing": 1.0},
+    )
+
+
+def sampling_context(method: str, path: str, **context: object) -> dict[str, object]:
+    return {
+        "asgi_scope": {"type": "http", "method": method, "path": path},
+        "parent_sampled": None,
+        **context,
+    }
+
+
+def test_traces_sampler_route_rates() -> None:
+    sampler = create_sampler()
+
+    assert sampler(sampling_context("GET", "/api/things/1")) == 1.0
+    assert sampler(sampling_context("GET", "/api/things/health")) == 0.0
+    assert sampler(sampling_context("GET", "/api/other")) == 0.25
+    assert sampler(sampling_context("POST", "/api/things/1")) == 0.25
+
+
+def test_traces_sampler_follows_parent() -> None:
+    sampler = create_sampler()
+
+    assert sampler(sampling_context("GET", "/api/other", parent_sampled=True)) == 1.0
+    assert sampler(sampling_context("GET", "/api/other", parent_sampled=False)) == 0.0
+    # Routes with their own rate ignore the upstream decision
+    health = sampling_context("GET", "/api/things/health", parent_sampled=True)
+    assert sampler(health) == 0.0
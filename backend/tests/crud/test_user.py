@@ -1,9 +1,14 @@
+import uuid
+
+import pytest
 from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
-from app.core.security import verify_password
-from app.models import User, UserCreate, UserUpdate
+from app.core.db import async_engine
+from app.core.security import create_password_context, pwd_context, verify_password
+from app.models import User, UserCreate, UserPublicVersioned, UserUpdate
 from tests.utils.utils import random_email, random_lower_string
 
 
@@ -26,6 +31,51 @@ def test_authenticate_user(db: Session) -> None:
     assert user.email == authenticated_user.email
 
 
+@pytest.mark.anyio
+async def test_authenticate_user_async() -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=email, password=password)
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            user = await crud.create_user_async(session=session, user_create=user_in)
+            authenticated_user = await crud.authenticate_async(
+                session=session, email=email, password=password
+            )
+            wrong_password_user = await crud.authenticate_async(
+                session=session, email=email, password=random_lower_string()
+            )
+    finally:
+        await async_engine.dispose()
+    assert authenticated_user
+    assert user.email == authenticated_user.email
+    assert wrong_password_user is None
+
+
+def test_authenticate_user_rehashes_deprecated_hash(db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=email, password=password)
+    user = crud.create_user(session=db, user_create=user_in)
+    bcrypt_context = create_password_context(
+        schemes=["bcrypt"],
+        argon2_memory_cost=8192,
+        argon2_time_cost=1,
+        argon2_parallelism=1,
+        bcrypt_rounds=4,
+    )
+    user.hashed_password = bcrypt_context.hash(password)
+    db.add(user)
+    db.commit()
+
+    authenticated_user = crud.authenticate(session=db, email=email, password=password)
+    assert authenticated_user
+    db.refresh(user)
+    assert not user.hashed_password.startswith("$2b$")
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert verify_password(password, user.hashed_password)
+
+
 def test_not_authenticate_user(db: Session) -> None:
     email = random_email()
     password = random_lower_string()
@@ -89,3 +139,45 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_update_user_increments_version(db: Session) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = crud.create_user(session=db, user_create=user_in)
+    assert user.version == 1
+    updated_at = user.updated_at
+    user = crud.update_user(
+        session=db, db_user=user, user_in=UserUpdate(full_name="Updated")
+    )
+    assert user.version == 2
+    assert user.updated_at >= updated_at
+
+
+@pytest.mark.anyio
+async def test_get_user_public_async(db: Session) -> None:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    try:
+        async with AsyncSession(async_engine) as session:
+            row = await crud.get_user_public_async(session=session, user_id=user.id)
+            missing = await crud.get_user_public_async(
+                session=session, user_id=uuid.uuid4()
+            )
+    finally:
+        await async_engine.dispose()
+    assert row
+    assert row._asdict() == UserPublicVersioned.model_validate(user).model_dump()
+    assert missing is None
+
+
+def test_get_user_by_email_ignores_case(db: Session) -> None:
+    email = random_email()
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=email, password=random_lower_string()),
+    )
+    found = crud.get_user_by_email(session=db, email=email.upper())
+    assert found
+    assert found.id == user.id
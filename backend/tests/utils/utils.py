@@ -1,9 +1,15 @@
 import random
 import string
+from collections.abc import Callable
+from contextlib import AbstractContextManager
 
 from fastapi.testclient import TestClient
 
 from app.core.config import settings
+from app.core.db import QueryStats
+
+# Type of the query_budget fixture
+QueryBudget = Callable[[int], AbstractContextManager[QueryStats]]
 
 
 def random_lower_string() -> str:
@@ -55,6 +55,114 @@ export const Body_login_login_access_tokenSchema = {
     title: 'Body_login-login_access_token'
 } as const;
 
+export const DatabasePoolStatsSchema = {
+    properties: {
+        pool_class: {
+            type: 'string',
+            title: 'Pool Class'
+        },
+        size: {
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Size'
+        },
+        checked_in: {
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Checked In'
+        },
+        checked_out: {
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Checked Out'
+        },
+        overflow: {
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Overflow'
+        },
+        checkouts: {
+            type: 'integer',
+            title: 'Checkouts',
+            default: 0
+        },
+        timeouts: {
+            type: 'integer',
+            title: 'Timeouts',
+            default: 0
+        },
+        wait_seconds_total: {
+            type: 'number',
+            title: 'Wait Seconds Total',
+            default: 0
+        },
+        wait_seconds_max: {
+            type: 'number',
+            title: 'Wait Seconds Max',
+            default: 0
+        }
+    },
+    type: 'object',
+    required: ['pool_class'],
+    title: 'DatabasePoolStats'
+} as const;
+
+export const EmailOutboxStatsSchema = {
+    properties: {
+        queued: {
+            type: 'integer',
+            title: 'Queued'
+        },
+        retrying: {
+            type: 'integer',
+            title: 'Retrying'
+        },
+        sent: {
+            type: 'integer',
+            title: 'Sent'
+        },
+        failed: {
+            type: 'integer',
+            title: 'Failed'
+        },
+        retried: {
+            type: 'integer',
+            title: 'Retried'
+        },
+        connections_opened: {
+            type: 'integer',
+            title: 'Connections Opened'
+        }
+    },
+    type: 'object',
+    required: ['queued', 'retrying', 'sent', 'failed', 'retried', 'connections_opened'],
+    title: 'EmailOutboxStats'
+} as const;
+
 export const HTTPValidationErrorSchema = {
     properties: {
         detail: {
@@ -69,6 +177,22 @@ export const HTTPValidationErrorSchema = {
     title: 'HTTPValidationError'
 } as const;
 
+export const ItemBulkErrorSchema = {
+    properties: {
+        index: {
+            type: 'integer',
+            title: 'Index'
+        },
+        detail: {
+            type: 'string',
+            title: 'Detail'
+        }
+    },
+    type: 'object',
+    required: ['index', 'detail'],
+    title: 'ItemBulkError'
+} as const;
+
 export const ItemCreateSchema = {
     properties: {
         title: {
@@ -124,10 +248,15 @@ export const ItemPublicSchema = {
             type: 'string',
             format: 'uuid',
             title: 'Owner Id'
+        },
+        created_at: {
+            type: 'string',
+            format: 'date-time',
+            title: 'Created At'
         }
     },
     type: 'object',
-    required: ['title', 'id', 'owner_id'],
+    required: ['title', 'id', 'owner_id', 'created_at'],
     title: 'ItemPublic'
 } as const;
 
@@ -163,6 +292,74 @@ export const ItemUpdateSchema = {
     title: 'ItemUpdate'
 } as const;
 
+export const ItemsBulkDeletedSchema = {
+    properties: {
+        ids: {
+            items: {
+                type: 'string',
+                format: 'uuid'
+            },
+            type: 'array',
+            title: 'Ids'
+        },
+        errors: {
+            items: {
+                '$ref': '#/components/schemas/ItemBulkError'
+            },
+            type: 'array',
+            title: 'Errors'
+        }
+    },
+    type: 'object',
+    required: ['ids', 'errors'],
+    title: 'ItemsBulkDeleted'
+} as const;
+
+export const ItemsBulkPublicSchema = {
+    properties: {
+        data: {
+            items: {
+                '$ref': '#/components/schemas/ItemPublic'
+            },
+            type: 'array',
+            title: 'Data'
+        },
+        errors: {
+            items: {
+                '$ref': '#/components/schemas/ItemBulkError'
+            },
+            type: 'array',
+            title: 'Errors'
+        }
+    },
+    type: 'object',
+    required: ['data', 'errors'],
+    title: 'ItemsBulkPublic'
+} as const;
+
+export const ItemsImportedSchema = {
+    properties: {
+        imported: {
+            type: 'integer',
+            title: 'Imported'
+        },
+        rejected: {
+            type: 'integer',
+            title: 'Rejected'
+        },
+        errors: {
+            items: {
+                '$ref': '#/components/schemas/ItemBulkError'
+            },
+            type: 'array',
+            title: 'Errors'
+        }
+    },
+    type: 'object',
+    required: ['imported', 'rejected', 'errors'],
+    title: 'ItemsImported'
+} as const;
+
 export const ItemsPublicSchema = {
     properties: {
         data: {
@@ -173,8 +370,26 @@ export const ItemsPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
         }
     },
     type: 'object',
@@ -247,6 +462,17 @@ export const TokenSchema = {
             type: 'string',
             title: 'Token Type',
             default: 'bearer'
+        },
+        refresh_token: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Refresh Token'
         }
     },
     type: 'object',
@@ -254,6 +480,18 @@ export const TokenSchema = {
     title: 'Token'
 } as const;
 
+export const TokenRefreshSchema = {
+    properties: {
+        refresh_token: {
+            type: 'string',
+            title: 'Refresh Token'
+        }
+    },
+    type: 'object',
+    required: ['refresh_token'],
+    title: 'TokenRefresh'
+} as const;
+
 export const UpdatePasswordSchema = {
     properties: {
         current_password: {
@@ -486,8 +724,26 @@ export const UsersPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
         }
     },
     type: 'object',
@@ -3,15 +3,24 @@
 import type { CancelablePromise } from './core/CancelablePromise';
 import { OpenAPI } from './core/OpenAPI';
 import { request as __request } from './core/request';
-import type { ItemsReadItemsData, ItemsReadItemsResponse, ItemsCreateItemData, ItemsCreateItemResponse, ItemsReadItemData, ItemsReadItemResponse, ItemsUpdateItemData, ItemsUpdateItemResponse, ItemsDeleteItemData, ItemsDeleteItemResponse, LoginLoginAccessTokenData, LoginLoginAccessTokenResponse, LoginTestTokenResponse, LoginRecoverPasswordData, LoginRecoverPasswordResponse, LoginResetPasswordData, LoginResetPasswordResponse, LoginRecoverPasswordHtmlContentData, LoginRecoverPasswordHtmlContentResponse, PrivateCreateUserData, PrivateCreateUserResponse, UsersReadUsersData, UsersReadUsersResponse, UsersCreateUserData, UsersCreateUserResponse, UsersReadUserMeResponse, UsersDeleteUserMeResponse, UsersUpdateUserMeData, UsersUpdateUserMeResponse, UsersUpdatePasswordMeData, UsersUpdatePasswordMeResponse, UsersRegisterUserData, UsersRegisterUserResponse, UsersReadUserByIdData, UsersReadUserByIdResponse, UsersUpdateUserData, UsersUpdateUserResponse, UsersDeleteUserData, UsersDeleteUserResponse, UtilsTestEmailData, UtilsTestEmailResponse, UtilsHealthCheckResponse } from './types.gen';
+import type { ItemsReadItemsData, ItemsReadItemsResponse, ItemsCreateItemData, ItemsCreateItemResponse, ItemsCreateItemsBulkData, ItemsCreateItemsBulkResponse, ItemsDeleteItemsBulkData, ItemsDeleteItemsBulkResponse, ItemsUpdateItemsBulkData, ItemsUpdateItemsBulkResponse, ItemsExportItemsData, ItemsExportItemsResponse, ItemsImportItemsData, ItemsImportItemsResponse, ItemsReadItemData, ItemsReadItemResponse, ItemsUpdateItemData, ItemsUpdateItemResponse, ItemsDeleteItemData, ItemsDeleteItemResponse, LoginLoginAccessTokenData, LoginLoginAccessTokenResponse, LoginRefreshAccessTokenData, LoginRefreshAccessTokenResponse, LoginTestTokenResponse, LoginRecoverPasswordData, LoginRecoverPasswordResponse, LoginResetPasswordData, LoginResetPasswordResponse, LoginRecoverPasswordHtmlContentData, LoginRecoverPasswordHtmlContentResponse, PrivateCreateUserData, PrivateCreateUserResponse, UsersReadUsersData, UsersReadUsersResponse, UsersCreateUserData, UsersCreateUserResponse, UsersReadUserMeResponse, UsersDeleteUserMeResponse, UsersUpdateUserMeData, UsersUpdateUserMeResponse, UsersUpdatePasswordMeData, UsersUpdatePasswordMeResponse, UsersRegisterUserData, UsersRegisterUserResponse, UsersReadUserByIdData, UsersReadUserByIdResponse, UsersUpdateUserData, UsersUpdateUserResponse, UsersDeleteUserData, UsersDeleteUserResponse, UtilsTestEmailData, UtilsTestEmailResponse, UtilsDbPoolResponse, UtilsEmailOutboxStatsResponse, UtilsHealthCheckResponse, WellKnownReadJwksResponse } from './types.gen';
 
 export class ItemsService {
     /**
      * Read Items
-     * Retrieve items.
+     * Retrieve items, oldest first.
+     *
+     * Pass the `next_cursor` of a previous page as `cursor` to seek directly to
+     * the following page instead of using `skip`. Use `count` to get a cached or
+     * estimated total instead of an exact one, or `none` to skip counting.
+     *
+     * Pages carry an `ETag`, send it back in `If-None-Match` to get a `304 Not
+     * Modified` response when the page didn't change.
      * @param data The data for the request.
      * @param data.skip
      * @param data.limit
+     * @param data.cursor
+     * @param data.count
      * @returns ItemsPublic Successful Response
      * @throws ApiError
      */
@@ -21,7 +30,9 @@ export class ItemsService {
             url: '/api/v1/items/',
             query: {
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                cursor: data.cursor,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -49,9 +60,126 @@ export class ItemsService {
         });
     }
     
+    /**
+     * Create Items Bulk
+     * Create several items in one transaction.
+     *
+     * Rows that don't validate are reported in `errors`, the others are created.
+     * @param data The data for the request.
+     * @param data.requestBody
+     * @returns ItemsBulkPublic Successful Response
+     * @throws ApiError
+     */
+    public static createItemsBulk(data: ItemsCreateItemsBulkData): CancelablePromise<ItemsCreateItemsBulkResponse> {
+        return __request(OpenAPI, {
+            method: 'POST',
+            url: '/api/v1/items/bulk',
+            body: data.requestBody,
+            mediaType: 'application/json',
+            errors: {
+                422: 'Validation Error'
+            }
+        });
+    }
+    
+    /**
+     * Delete Items Bulk
+     * Delete several items by ID in one transaction.
+     *
+     * IDs of items that don't exist or can't be deleted are reported in `errors`.
+     * @param data The data for the request.
+     * @param data.requestBody
+     * @returns ItemsBulkDeleted Successful Response
+     * @throws ApiError
+     */
+    public static deleteItemsBulk(data: ItemsDeleteItemsBulkData): CancelablePromise<ItemsDeleteItemsBulkResponse> {
+        return __request(OpenAPI, {
+            method: 'DELETE',
+            url: '/api/v1/items/bulk',
+            body: data.requestBody,
+            mediaType: 'application/json',
+            errors: {
+                422: 'Validation Error'
+            }
+        });
+    }
+    
+    /**
+     * Update Items Bulk
+     * Update several items in one transaction, each row needs the item `id`.
+     *
+     * Rows that don't validate or that refer to items that don't exist or can't
+     * be modified are reported in `errors`, the others are updated.
+     * @param data The data for the request.
+     * @param data.requestBody
+     * @returns ItemsBulkPublic Successful Response
+     * @throws ApiError
+     */
+    public static updateItemsBulk(data: ItemsUpdateItemsBulkData): CancelablePromise<ItemsUpdateItemsBulkResponse> {
+        return __request(OpenAPI, {
+            method: 'PATCH',
+            url: '/api/v1/items/bulk',
+            body: data.requestBody,
+            mediaType: 'application/json',
+            errors: {
+                422: 'Validation Error'
+            }
+        });
+    }
+    
+    /**
+     * Export Items
+     * Export all the items, as newline delimited JSON or CSV, streamed in batches.
+     * @param data The data for the request.
+     * @param data.format
+     * @returns unknown Successful Response
+     * @throws ApiError
+     */
+    public static exportItems(data: ItemsExportItemsData = {}): CancelablePromise<ItemsExportItemsResponse> {
+        return __request(OpenAPI, {
+            method: 'GET',
+            url: '/api/v1/items/export',
+            query: {
+                format: data.format
+            },
+            errors: {
+                422: 'Validation Error'
+            }
+        });
+    }
+    
+    /**
+     * Import Items
+     * Import items from a newline delimited JSON or CSV request body, the format
+     * of the export.
+     *
+     * The body is parsed as it is received and the valid rows are loaded in
+     * batches as they fill up, so a failure part way keeps the batches loaded so
+     * far. Invalid rows are skipped and reported by their position in the file.
+     * @param data The data for the request.
+     * @param data.format
+     * @returns ItemsImported Successful Response
+     * @throws ApiError
+     */
+    public static importItems(data: ItemsImportItemsData = {}): CancelablePromise<ItemsImportItemsResponse> {
+        return __request(OpenAPI, {
+            method: 'POST',
+            url: '/api/v1/items/import',
+            query: {
+                format: data.format
+            },
+            errors: {
+                422: 'Validation Error'
+            }
+        });
+    }
+    
     /**
      * Read Item
      * Get item by ID.
+     *
+     * Send the `ETag` of a previous response in `If-None-Match` to get a `304 Not
+     * Modified` response when the item didn't change.
      * @param data The data for the request.
      * @param data.id
      * @returns ItemPublic Successful Response
@@ -119,7 +247,8 @@ export class ItemsService {
 export class LoginService {
     /**
      * Login Access Token
-     * OAuth2 compatible token login, get an access token for future requests
+     * OAuth2 compatible token login, get an access token for future requests and
+     * a refresh token to renew it
      * @param data The data for the request.
      * @param data.formData
      * @returns Token Successful Response
@@ -137,6 +266,26 @@ export class LoginService {
         });
     }
     
+    /**
+     * Refresh Access Token
+     * Get a new access token, and a new refresh token replacing the given one
+     * @param data The data for the request.
+     * @param data.requestBody
+     * @returns Token Successful Response
+     * @throws ApiError
+     */
+    public static refreshAccessToken(data: LoginRefreshAccessTokenData): CancelablePromise<LoginRefreshAccessTokenResponse> {
+        return __request(OpenAPI, {
+            method: 'POST',
+            url: '/api/v1/login/refresh',
+            body: data.requestBody,
+            mediaType: 'application/json',
+            errors: {
+                422: 'Validation Error'
+            }
+        });
+    }
+    
     /**
      * Test Token
      * Test access token
@@ -239,9 +388,18 @@ export class UsersService {
     /**
      * Read Users
      * Retrieve users.
+     *
+     * Pass the `next_cursor` of a previous page as `cursor` to seek directly to
+     * the following page instead of using `skip`. Use `count` to get a cached or
+     * estimated total instead of an exact one, or `none` to skip counting.
+     *
+     * Pages carry an `ETag`, send it back in `If-None-Match` to get a `304 Not
+     * Modified` response when the page didn't change.
      * @param data The data for the request.
      * @param data.skip
      * @param data.limit
+     * @param data.cursor
+     * @param data.count
      * @returns UsersPublic Successful Response
      * @throws ApiError
      */
@@ -251,7 +409,9 @@ export class UsersService {
             url: '/api/v1/users/',
             query: {
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                cursor: data.cursor,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -282,6 +442,9 @@ export class UsersService {
     /**
      * Read User Me
      * Get current user.
+     *
+     * Send the `ETag` of a previous response in `If-None-Match` to get a `304 Not
+     * Modified` response when the user didn't change.
      * @returns UserPublic Successful Response
      * @throws ApiError
      */
@@ -368,6 +531,9 @@ export class UsersService {
     /**
      * Read User By Id
      * Get a specific user by id.
+     *
+     * Send the `ETag` of a previous response in `If-None-Match` to get a `304 Not
+     * Modified` response when the user didn't change.
      * @param data The data for the request.
      * @param data.userId
      * @returns UserPublic Successful Response
@@ -454,6 +620,32 @@ export class UtilsService {
         });
     }
     
+    /**
+     * Db Pool
+     * Database connection pool usage of this worker process.
+     * @returns DatabasePoolStats Successful Response
+     * @throws ApiError
+     */
+    public static dbPool(): CancelablePromise<UtilsDbPoolResponse> {
+        return __request(OpenAPI, {
+            method: 'GET',
+            url: '/api/v1/utils/db-pool/'
+        });
+    }
+    
+    /**
+     * Email Outbox Stats
+     * Email outbox queue and delivery counters of this worker process.
+     * @returns EmailOutboxStats Successful Response
+     * @throws ApiError
+     */
+    public static emailOutboxStats(): CancelablePromise<UtilsEmailOutboxStatsResponse> {
+        return __request(OpenAPI, {
+            method: 'GET',
+            url: '/api/v1/utils/email-outbox/'
+        });
+    }
+    
     /**
      * Health Check
      * @returns boolean Successful Response
@@ -465,4 +657,20 @@ export class UtilsService {
             url: '/api/v1/utils/health-check/'
         });
     }
+}
+
+export class WellKnownService {
+    /**
+     * Read Jwks
+     * Public keys verifying the access tokens, selected by the `kid` header of the
+     * token.
+     * @returns unknown Successful Response
+     * @throws ApiError
+     */
+    public static readJwks(): CancelablePromise<WellKnownReadJwksResponse> {
+        return __request(OpenAPI, {
+            method: 'GET',
+            url: '/.well-known/jwks.json'
+        });
+    }
 }
\ No newline at end of file
@@ -9,10 +9,36 @@ export type Body_login_login_access_token = {
     client_secret?: (string | null);
 };
 
+export type DatabasePoolStats = {
+    pool_class: string;
+    size?: (number | null);
+    checked_in?: (number | null);
+    checked_out?: (number | null);
+    overflow?: (number | null);
+    checkouts?: number;
+    timeouts?: number;
+    wait_seconds_total?: number;
+    wait_seconds_max?: number;
+};
+
+export type EmailOutboxStats = {
+    queued: number;
+    retrying: number;
+    sent: number;
+    failed: number;
+    retried: number;
+    connections_opened: number;
+};
+
 export type HTTPValidationError = {
     detail?: Array<ValidationError>;
 };
 
+export type ItemBulkError = {
+    index: number;
+    detail: string;
+};
+
 export type ItemCreate = {
     title: string;
     description?: (string | null);
@@ -23,11 +49,29 @@ export type ItemPublic = {
     description?: (string | null);
     id: string;
     owner_id: string;
+    created_at: string;
+};
+
+export type ItemsBulkDeleted = {
+    ids: Array<(string)>;
+    errors: Array<ItemBulkError>;
+};
+
+export type ItemsBulkPublic = {
+    data: Array<ItemPublic>;
+    errors: Array<ItemBulkError>;
+};
+
+export type ItemsImported = {
+    imported: number;
+    rejected: number;
+    errors: Array<ItemBulkError>;
 };
 
 export type ItemsPublic = {
     data: Array<ItemPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
 };
 
 export type ItemUpdate = {
@@ -54,6 +98,11 @@ export type PrivateUserCreate = {
 export type Token = {
     access_token: string;
     token_type?: string;
+    refresh_token?: (string | null);
+};
+
+export type TokenRefresh = {
+    refresh_token: string;
 };
 
 export type UpdatePassword = {
@@ -85,7 +134,8 @@ export type UserRegister = {
 
 export type UsersPublic = {
     data: Array<UserPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
 };
 
 export type UserUpdate = {
@@ -108,6 +158,8 @@ export type ValidationError = {
 };
 
 export type ItemsReadItemsData = {
+    count?: 'exact' | 'cached' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -120,6 +172,40 @@ export type ItemsCreateItemData = {
 
 export type ItemsCreateItemResponse = (ItemPublic);
 
+export type ItemsCreateItemsBulkData = {
+    requestBody: Array<{
+        [key: string]: unknown;
+    }>;
+};
+
+export type ItemsCreateItemsBulkResponse = (ItemsBulkPublic);
+
+export type ItemsDeleteItemsBulkData = {
+    requestBody: Array<(string)>;
+};
+
+export type ItemsDeleteItemsBulkResponse = (ItemsBulkDeleted);
+
+export type ItemsUpdateItemsBulkData = {
+    requestBody: Array<{
+        [key: string]: unknown;
+    }>;
+};
+
+export type ItemsUpdateItemsBulkResponse = (ItemsBulkPublic);
+
+export type ItemsExportItemsData = {
+    format?: 'ndjson' | 'csv';
+};
+
+export type ItemsExportItemsResponse = (unknown);
+
+export type ItemsImportItemsData = {
+    format?: 'ndjson' | 'csv';
+};
+
+export type ItemsImportItemsResponse = (ItemsImported);
+
 export type ItemsReadItemData = {
     id: string;
 };
@@ -145,6 +231,12 @@ export type LoginLoginAccessTokenData = {
 
 export type LoginLoginAccessTokenResponse = (Token);
 
+export type LoginRefreshAccessTokenData = {
+    requestBody: TokenRefresh;
+};
+
+export type LoginRefreshAccessTokenResponse = (Token);
+
 export type LoginTestTokenResponse = (UserPublic);
 
 export type LoginRecoverPasswordData = {
@@ -172,6 +264,8 @@ export type PrivateCreateUserData = {
 export type PrivateCreateUserResponse = (UserPublic);
 
 export type UsersReadUsersData = {
+    count?: 'exact' | 'cached' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -231,4 +325,10 @@ export type UtilsTestEmailData = {
 
 export type UtilsTestEmailResponse = (Message);
 
-export type UtilsHealthCheckResponse = (boolean);
\ No newline at end of file
+export type UtilsDbPoolResponse = (DatabasePoolStats);
+
+export type UtilsEmailOutboxStatsResponse = (EmailOutboxStats);
+
+export type UtilsHealthCheckResponse = (boolean);
+
+export type WellKnownReadJwksResponse = (unknown);
\ No newline at end of file
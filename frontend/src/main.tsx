@@ -7,18 +7,81 @@ import {
 import { createRouter, RouterProvider } from "@tanstack/react-router"
 import { StrictMode } from "react"
 import ReactDOM from "react-dom/client"
-import { ApiError, OpenAPI } from "./client"
+import { ApiError, OpenAPI, type Token } from "./client"
 import { CustomProvider } from "./components/ui/provider"
 import { routeTree } from "./routeTree.gen"
 
 OpenAPI.BASE = import.meta.env.VITE_API_URL
+
+// Access tokens are short-lived, renew them with the refresh token shortly
+// before they expire
+const expiresSoon = (token: string) => {
+  try {
+    const payload = token.split(".")[1].replace(/-/g, "+").replace(/_/g, "/")
+    const { exp } = JSON.parse(atob(payload))
+    return exp * 1000 - Date.now() < 30_000
+  } catch {
+    return false
+  }
+}
+
+const refreshAccessToken = async () => {
+  // Another tab may have refreshed the tokens while this one waited
+  const accessToken = localStorage.getItem("access_token")
+  if (accessToken && !expiresSoon(accessToken)) {
+    return accessToken
+  }
+  const refreshToken = localStorage.getItem("refresh_token")
+  if (!refreshToken) {
+    return null
+  }
+  const response = await fetch(`${OpenAPI.BASE}/api/v1/login/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  })
+  if (!response.ok) {
+    localStorage.removeItem("refresh_token")
+    return null
+  }
+  const tokens: Token = await response.json()
+  localStorage.setItem("access_token", tokens.access_token)
+  if (tokens.refresh_token) {
+    localStorage.setItem("refresh_token", tokens.refresh_token)
+  }
+  return tokens.access_token
+}
+
+// A refresh token can only be used once, the tabs of the app take turns to
+// refresh with a lock (only available in secure contexts)
+const refreshAccessTokenOnce = async (): Promise<string | null> => {
+  if (!navigator.locks) {
+    return refreshAccessToken()
+  }
+  return await navigator.locks.request(
+    "refresh-access-token",
+    refreshAccessToken,
+  )
+}
+
+// Shared by concurrent requests of this tab
+let refreshing: Promise<string | null> | null = null
+
 OpenAPI.TOKEN = async () => {
-  return localStorage.getItem("access_token") || ""
+  const token = localStorage.getItem("access_token") || ""
+  if (token && expiresSoon(token)) {
+    refreshing ??= refreshAccessTokenOnce().finally(() => {
+      refreshing = null
+    })
+    return (await refreshing) || token
+  }
+  return token
 }
 
 const handleApiError = (error: Error) => {
   if (error instanceof ApiError && [401, 403].includes(error.status)) {
     localStorage.removeItem("access_token")
+    localStorage.removeItem("refresh_token")
     window.location.href = "/login"
   }
 }